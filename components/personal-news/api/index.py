@@ -7,15 +7,18 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from personal_news import generate_broadcast  # noqa: E402
+from personal_news import generate_broadcast, stream_broadcast  # noqa: E402
+from personal_news.sse import sse_stream  # noqa: E402
+from utils.singleflight import SingleFlight, payload_key  # noqa: E402
 
 app = Flask(__name__)
+_GENERATE_FLIGHT = SingleFlight()
 
 
 def _resolve_readme_path(target: str) -> Path | None:
@@ -175,12 +178,51 @@ def api_generate():
     try:
         config = payload.get("config", {})
         inputs = payload.get("inputs", [])
-        script = generate_broadcast(config, inputs)
+        key = payload_key({"config": config, "inputs": inputs})
+        script, shared = _GENERATE_FLIGHT.do(key, generate_broadcast, config, inputs)
     except (ValueError, TypeError, json.JSONDecodeError) as exc:
         return jsonify({"error": f"Invalid payload: {exc}"}), 400
     except Exception as exc:  # noqa: BLE001
         return jsonify({"error": str(exc)}), 500
-    return jsonify({"script": script})
+    response = jsonify({"script": script})
+    if shared:
+        response.headers["X-Coalesced"] = "1"
+    return response
+
+
+@app.post("/api/generate/stream")
+def api_generate_stream():
+    payload = request.get_json(silent=True) or {}
+    config = payload.get("config", {})
+    inputs = payload.get("inputs", [])
+    if not isinstance(config, dict) or not isinstance(inputs, list):
+        return jsonify({"error": "Invalid payload: config must be an object, inputs a list"}), 400
+    chunks = stream_broadcast(config, inputs)
+    return Response(
+        stream_with_context(sse_stream(chunks)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/jobs")
+def api_create_job():
+    return _jobs_unavailable()
+
+
+@app.get("/api/jobs/<job_id>")
+def api_get_job(job_id: str):
+    return _jobs_unavailable()
+
+
+@app.get("/api/jobs/<job_id>/events")
+def api_job_events(job_id: str):
+    return _jobs_unavailable()
+
+
+def _jobs_unavailable():
+    message = "Async jobs need a long-running server (web/app.py); use /api/generate/stream here"
+    return jsonify({"error": message}), 501
 
 
 @app.post("/api/run-tests")
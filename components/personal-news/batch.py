@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main  # noqa: E402
+from utils import http_client  # noqa: E402
+
+DEFAULT_EDITOR_WORKERS = 4
+SHARED_FETCH_OPTIONS = (
+    "cache_dir",
+    "rss_fetch_deadline_seconds",
+    "rss_full_text_deadline_seconds",
+    "rss_full_text_per_host",
+    "rss_full_text_workers",
+    "rss_lookback_hours",
+    "rss_max_feed_bytes",
+    "rss_max_items_per_feed",
+    "rss_max_workers",
+    "rss_only_new",
+    "x_incremental",
+    "x_max_workers",
+    "x_user_cache_ttl_seconds",
+    "x_user_missing_ttl_seconds",
+)
+
+
+def load_user_configs(paths: List[Path], base: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    files: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.json")))
+        else:
+            files.append(path)
+    users = []
+    for path in files:
+        config = {**base, **main.load_config(path)}
+        users.append((str(config.get("user_id") or path.stem), config))
+    return users
+
+
+def build_batch_inputs(configs: List[Dict[str, Any]], base: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="batch-source") as executor:
+        rss_future = executor.submit(main.rss_module.fetch_rss_items_batch, configs, base)
+        x_future = executor.submit(main.x_module.fetch_x_items_batch, configs, base)
+        weather_future = executor.submit(_fetch_weather_batch, configs)
+        rss_lists = rss_future.result()
+        x_lists = x_future.result()
+        weather_lists = weather_future.result()
+    batch: List[List[Dict[str, Any]]] = []
+    for rss_items, x_items, weather_items in zip(rss_lists, x_lists, weather_lists):
+        inputs: List[Dict[str, Any]] = []
+        if rss_items:
+            inputs.append({"source": "rss", "items": rss_items})
+        if x_items:
+            inputs.append({"source": "x", "items": x_items})
+        if weather_items:
+            inputs.append({"source": "weather", "items": weather_items})
+        batch.append(inputs)
+    return batch
+
+
+def _fetch_weather_batch(configs: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for index, config in enumerate(configs):
+        if config.get("city"):
+            group = (config.get("weather_provider", "wttr"), config.get("weather_lang", "zh-cn"))
+            groups.setdefault(group, []).append(index)
+    results: List[List[Dict[str, Any]]] = [[] for _ in configs]
+    for indexes in groups.values():
+        config = configs[indexes[0]]
+        cities = [configs[index]["city"] for index in indexes]
+        by_city = main.weather_module.fetch_weather_batch(cities, config)
+        for index in indexes:
+            results[index] = [dict(item) for item in by_city.get(configs[index]["city"], [])]
+    return results
+
+
+def generate_batch(
+    users: List[Tuple[str, Dict[str, Any]]],
+    base: Dict[str, Any],
+    config_dir: Path,
+) -> List[Dict[str, Any]]:
+    configs = [config for _, config in users]
+    ignored: Dict[str, List[str]] = {}
+    for user, config in users:
+        keys = [key for key in SHARED_FETCH_OPTIONS if config.get(key) != base.get(key)]
+        if keys:
+            ignored[user] = keys
+    if ignored:
+        print(json.dumps({"batch_ignored_overrides": ignored}, ensure_ascii=False), file=sys.stderr)
+    batch_inputs = build_batch_inputs(configs, base)
+    payloads = [
+        {"config": config, "inputs": main.rank_inputs(config, inputs, config_dir)}
+        for config, inputs in zip(configs, batch_inputs)
+    ]
+
+    def run(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            return main.generate_broadcast_script(payload), None
+        except Exception as exc:  # noqa: BLE001
+            return None, str(exc)
+
+    max_workers = int(base.get("batch_editor_workers", DEFAULT_EDITOR_WORKERS) or 1)
+    with ThreadPoolExecutor(
+        max_workers=max(min(max_workers, len(payloads)), 1),
+        thread_name_prefix="batch-editor",
+    ) as executor:
+        outcomes = list(executor.map(run, payloads))
+    return [
+        {"user": user, "script": script, "error": error}
+        for (user, _), (script, error) in zip(users, outcomes)
+    ]
+
+
+def _cli() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate broadcasts for many user configs")
+    parser.add_argument("configs", nargs="+", help="User config files or directories of *.json")
+    parser.add_argument("--base", help="Shared config merged under every user config")
+    parser.add_argument("--out", help="Directory to write <user>.txt scripts into")
+    args = parser.parse_args()
+    base_path = Path(args.base).resolve() if args.base else None
+    base = main.load_config(base_path) if base_path else {}
+    http_client.configure_from_config(base)
+    users = load_user_configs([Path(path).resolve() for path in args.configs], base)
+    config_dir = base_path.parent if base_path else Path.cwd()
+    results = generate_batch(users, base, config_dir)
+    out_dir = Path(args.out) if args.out else None
+    if out_dir:
+        out_dir.mkdir(parents=True, exist_ok=True)
+    for result in results:
+        if out_dir and result["script"] is not None:
+            (out_dir / f"{result['user']}.txt").write_text(result["script"], encoding="utf-8")
+        else:
+            print(json.dumps(result, ensure_ascii=False))
+    failed = sum(1 for result in results if result["error"])
+    print(json.dumps({"users": len(results), "failed": failed}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    _cli()
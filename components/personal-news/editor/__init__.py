@@ -1,3 +1,12 @@
-from .client import generate_broadcast_script
+from .client import generate_broadcast_script, stream_broadcast_script
+from .resilience import llm_call_stats
+from .response_cache import response_cache_stats
+from .sections import generate_sectioned_script
 
-__all__ = ["generate_broadcast_script"]
+__all__ = [
+    "generate_broadcast_script",
+    "generate_sectioned_script",
+    "llm_call_stats",
+    "response_cache_stats",
+    "stream_broadcast_script",
+]
@@ -4,47 +4,158 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from utils import load_env_file
+from editor.dedupe import collapse_duplicates
+from editor.packer import estimate_tokens, pack_inputs, prompt_token_budget
+from editor.resilience import DEFAULT_TIMEOUT_SECONDS, call_with_failover, parse_targets
+from editor.response_cache import (
+    cache_key,
+    is_cacheable,
+    load_response,
+    record_bypass,
+    response_cache_stats,
+    store_response,
+)
+from utils import http_client, load_env_file
 
 
-def generate_broadcast_script(payload: Dict[str, Any]) -> str:
+PROMPT_NAME = "prompt.txt"
+
+
+def generate_broadcast_script(
+    payload: Dict[str, Any],
+    use_cache: bool = True,
+    report: Optional[Dict[str, Any]] = None,
+) -> str:
+    return complete(_prepare_call(payload, use_cache, report=report))
+
+
+def complete(call: Dict[str, Any]) -> str:
+    if call["cached"] is not None:
+        return call["cached"]
+    response = _post(call, call["body"], stream=False)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as exc:
+        detail = response.text
+        raise RuntimeError(f"LLM API error: {detail}") from exc
+    data = response.json()
+    content = data["choices"][0]["message"]["content"].strip()
+    _remember(call, content)
+    return content
+
+
+def stream_broadcast_script(payload: Dict[str, Any], use_cache: bool = True) -> Iterator[str]:
+    call = _prepare_call(payload, use_cache)
+    if call["cached"] is not None:
+        yield call["cached"]
+        return
+    response = _post(call, {**call["body"], "stream": True}, stream=True)
+    parts: List[str] = []
+    try:
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as exc:
+            detail = response.text
+            raise RuntimeError(f"LLM API error: {detail}") from exc
+        for chunk in _iter_stream_deltas(response.iter_lines(decode_unicode=True)):
+            parts.append(chunk)
+            yield chunk
+    finally:
+        response.close()
+    _remember(call, "".join(parts).strip())
+
+
+def _prepare_call(
+    payload: Dict[str, Any],
+    use_cache: bool,
+    prompt_name: str = PROMPT_NAME,
+    shrink: bool = True,
+    report: Optional[Dict[str, Any]] = None,
+    budget_share: float = 1.0,
+) -> Dict[str, Any]:
     load_env_file(Path(__file__).resolve().parents[1] / "env.secret")
     api_key = os.getenv("LLM_API_KEY")
     if not api_key:
         raise RuntimeError("Missing LLM_API_KEY")
-    base_url = os.getenv("LLM_API_BASE", "https://api.openai.com")
-    model = os.getenv("LLM_MODEL", "gpt-4o-mini")
-    temperature = float(payload.get("config", {}).get("llm_temperature", 0.2))
-    compact = _shrink_payload(payload)
-    prompt = _build_prompt(compact)
-
-    response = requests.post(
-        f"{base_url.rstrip('/')}/v1/chat/completions",
-        headers={"Authorization": f"Bearer {api_key}"},
-        json={
+    targets = parse_targets(os.getenv("LLM_API_BASE"), os.getenv("LLM_MODEL"))
+    model = targets[0][1]
+    config = payload.get("config", {}) or {}
+    temperature = float(config.get("llm_temperature", 0.2))
+    if shrink:
+        compact = _shrink_payload(payload, model, prompt_name, report, budget_share)
+    else:
+        compact = payload
+        if report is not None:
+            report["inputs"] = payload.get("inputs", []) or []
+    prompt = _build_prompt(compact, prompt_name)
+    key = None
+    cached = None
+    if use_cache and is_cacheable(config, temperature):
+        key = cache_key(prompt[0]["content"], compact, model, temperature)
+        cached = load_response(config, key)
+    else:
+        record_bypass()
+    return {
+        "targets": targets,
+        "headers": {"Authorization": f"Bearer {api_key}"},
+        "body": {
             "model": model,
             "temperature": temperature,
             "messages": prompt,
         },
-        timeout=30,
-    )
-    try:
-        response.raise_for_status()
-    except requests.HTTPError as exc:
-        detail = response.text
-        raise RuntimeError(f"LLM API error: {detail}") from exc
-    data = response.json()
-    return data["choices"][0]["message"]["content"].strip()
-
-
-def _build_prompt(payload: Dict[str, Any]) -> List[Dict[str, str]]:
-    system = _load_prompt_text()
+        "config": config,
+        "key": key,
+        "cached": cached,
+    }
+
+
+def _post(call: Dict[str, Any], body: Dict[str, Any], stream: bool) -> requests.Response:
+    config = call["config"]
+    timeout = float(config.get("llm_timeout_seconds", DEFAULT_TIMEOUT_SECONDS))
+
+    def send(base_url: str, model: str) -> requests.Response:
+        kwargs: Dict[str, Any] = {"stream": True} if stream else {}
+        return http_client.post(
+            f"{base_url.rstrip('/')}/v1/chat/completions",
+            headers=call["headers"],
+            json={**body, "model": model},
+            timeout=timeout,
+            **kwargs,
+        )
+
+    return call_with_failover(call["targets"], send, config)
+
+
+def _remember(call: Dict[str, Any], content: str) -> None:
+    if call["key"] is not None and content:
+        store_response(call["config"], call["key"], content, call["body"]["messages"])
+
+
+def _iter_stream_deltas(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        for choice in event.get("choices") or []:
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+
+
+def _build_prompt(payload: Dict[str, Any], prompt_name: str = PROMPT_NAME) -> List[Dict[str, str]]:
+    system = _load_prompt_text(prompt_name)
     user = json.dumps(payload, ensure_ascii=False)
     return [
         {"role": "system", "content": system},
@@ -52,45 +163,43 @@ def _build_prompt(payload: Dict[str, Any]) -> List[Dict[str, str]]:
     ]
 
 
-def _shrink_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
-    config = payload.get("config", {})
+def _shrink_payload(
+    payload: Dict[str, Any],
+    model: Optional[str] = None,
+    prompt_name: str = PROMPT_NAME,
+    report: Optional[Dict[str, Any]] = None,
+    budget_share: float = 1.0,
+) -> Dict[str, Any]:
+    config = payload.get("config", {}) or {}
     inputs = payload.get("inputs", []) or []
-    compact_inputs = []
-    for source_block in inputs:
-        source = source_block.get("source")
-        items = source_block.get("items", []) or []
-        trimmed = [_trim_item(source, item) for item in items[:3]]
-        compact_inputs.append({"source": source, "items": trimmed})
-    return {"config": config, "inputs": compact_inputs}
-
-
-def _trim_item(source: str, item: Dict[str, Any]) -> Dict[str, Any]:
-    if source == "rss":
-        return {
-            "title": _truncate(item.get("title", ""), 120),
-            "summary": _truncate(item.get("summary", ""), 600),
-            "published_at": item.get("published_at"),
-            "source_name": item.get("source_name"),
-        }
-    if source == "x":
-        return {
-            "author": item.get("author"),
-            "text": _truncate(item.get("text", ""), 280),
-            "engagement": item.get("engagement", {}),
-            "created_at": item.get("created_at"),
-        }
-    if source == "weather":
-        return {"summary": _truncate(item.get("summary", ""), 200)}
-    return item
-
-
-def _truncate(text: str, limit: int) -> str:
-    if not text:
-        return ""
-    text = str(text)
-    if len(text) <= limit:
-        return text
-    return text[: limit - 1].rstrip() + "…"
+    model = model or parse_targets(None, os.getenv("LLM_MODEL"))[0][1]
+    overhead = estimate_tokens(_load_prompt_text(prompt_name)) + estimate_tokens(
+        json.dumps(config, ensure_ascii=False)
+    )
+    budget = int(prompt_token_budget(config, model) * budget_share) - overhead
+    dedupe_report: Dict[str, Any] = {"merged": {}}
+    collapsed = inputs
+    if config.get("dedupe_enabled", True):
+        collapsed = collapse_duplicates(inputs, config, dedupe_report)
+    pack_report: Dict[str, Any] = {}
+    packed = pack_inputs(collapsed, config, budget, report=pack_report)
+    if report is not None:
+        report["inputs"] = _used_inputs(inputs, collapsed, pack_report["chosen"], dedupe_report["merged"])
+    return {**payload, "config": config, "inputs": packed}
+
+
+def _used_inputs(
+    inputs: List[Dict[str, Any]],
+    collapsed: List[Dict[str, Any]],
+    chosen: List[Tuple[int, int]],
+    merged: Dict[Tuple[int, int], List[Tuple[int, int]]],
+) -> List[Dict[str, Any]]:
+    used: List[Dict[str, Any]] = [{"source": block.get("source"), "items": []} for block in inputs]
+    for block_index, position in chosen:
+        used[block_index]["items"].append(collapsed[block_index]["items"][position])
+        for member_block, member_position in merged.get((block_index, position), []):
+            used[member_block]["items"].append(inputs[member_block]["items"][member_position])
+    return [block for block in used if block["items"]]
 
 
 def _load_json(path: str) -> Dict[str, Any]:
@@ -101,10 +210,10 @@ def _load_json(path: str) -> Dict[str, Any]:
     return data
 
 
-def _load_prompt_text() -> str:
-    prompt_path = Path(__file__).resolve().parent / "prompt.txt"
+def _load_prompt_text(prompt_name: str = PROMPT_NAME) -> str:
+    prompt_path = Path(__file__).resolve().parent / prompt_name
     if not prompt_path.exists():
-        raise RuntimeError("Missing editor prompt.txt")
+        raise RuntimeError(f"Missing editor {prompt_name}")
     return prompt_path.read_text(encoding="utf-8").strip()
 
 
@@ -113,10 +222,12 @@ def _cli() -> None:
 
     parser = argparse.ArgumentParser(description="Generate broadcast script with LLM")
     parser.add_argument("json_path", help="Path to personal news JSON")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
     args = parser.parse_args()
     payload = _load_json(args.json_path)
-    script = generate_broadcast_script(payload)
+    script = generate_broadcast_script(payload, use_cache=not args.no_cache)
     print(script)
+    print(json.dumps({"response_cache": response_cache_stats()}), file=sys.stderr)
 
 
 if __name__ == "__main__":
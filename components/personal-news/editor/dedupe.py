@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+SIGNATURE_BINS = 64
+BAND_ROWS = 1
+DEFAULT_THRESHOLD = 0.5
+MIN_SHARED_SHINGLES = 3
+MAX_BUCKET_SIZE = 32
+MIN_BAND_COLLISIONS = 2
+SUMMARY_LEAD_CHARS = 280
+DEFAULT_SOURCE_PRIORITY = ("x", "rss")
+HASH_MASK = (1 << 64) - 1
+EMPTY_BIN = HASH_MASK
+
+_WORD = re.compile(r"[a-z0-9]{2,}")
+_CJK_RUN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]{2,}")
+_URL = re.compile(r"https?://\S+")
+STOPWORDS = frozenset(
+    (
+        "a an and are as at be by for from has have in is it its of on or that the this to was "
+        "were will with"
+    ).split()
+)
+
+
+def collapse_duplicates(
+    inputs: List[Dict[str, Any]],
+    config: Optional[Dict[str, Any]] = None,
+    report: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    config = config or {}
+    priority = list(config.get("dedupe_source_priority") or DEFAULT_SOURCE_PRIORITY)
+    threshold = float(config.get("dedupe_threshold", DEFAULT_THRESHOLD))
+    refs: List[Tuple[int, int]] = []
+    shingle_sets: List[Set[int]] = []
+    for block_index, block in enumerate(inputs):
+        if block.get("source") not in priority:
+            continue
+        for position, item in enumerate(block.get("items", []) or []):
+            shingles = shingle_set(_story_text(block.get("source"), item))
+            if shingles:
+                refs.append((block_index, position))
+                shingle_sets.append(shingles)
+    frequency = Counter(shingle for shingles in shingle_sets for shingle in shingles)
+    common = {shingle for shingle, count in frequency.items() if count > MAX_BUCKET_SIZE}
+    if common:
+        shingle_sets = [shingles - common for shingles in shingle_sets]
+    clusters = find_clusters(shingle_sets, threshold)
+    if report is not None:
+        report["merged"] = {}
+    if not clusters:
+        return inputs
+
+    dropped: Set[Tuple[int, int]] = set()
+    merged: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    members_of: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for members in clusters:
+        located = [refs[member] for member in members]
+        located.sort(key=lambda ref: (priority.index(inputs[ref[0]]["source"]), ref))
+        keeper = located[0]
+        attribution = _attribution(inputs, located)
+        item = dict(inputs[keeper[0]]["items"][keeper[1]])
+        item["also_reported_by"] = [name for name in attribution if name != _label(inputs, keeper)]
+        merged[keeper] = item
+        members_of[keeper] = located[1:]
+        dropped.update(located[1:])
+
+    collapsed = []
+    for block_index, block in enumerate(inputs):
+        items = []
+        for position, item in enumerate(block.get("items", []) or []):
+            ref = (block_index, position)
+            if ref in dropped:
+                continue
+            if ref in members_of and report is not None:
+                report["merged"][(block_index, len(items))] = members_of[ref]
+            items.append(merged.get(ref, item))
+        collapsed.append({**block, "items": items})
+    return collapsed
+
+
+def shingle_set(text: str) -> Set[int]:
+    text = _URL.sub(" ", text.lower())
+    terms = {word for word in _WORD.findall(text) if word not in STOPWORDS}
+    for run in _CJK_RUN.findall(text):
+        terms.update(run[index : index + 2] for index in range(len(run) - 1))
+    return set(map(_stable_hash, terms))
+
+
+@lru_cache(maxsize=65536)
+def _stable_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def signature(shingles: Iterable[int]) -> List[int]:
+    bins = [EMPTY_BIN] * SIGNATURE_BINS
+    for value in shingles:
+        slot = value % SIGNATURE_BINS
+        rest = value // SIGNATURE_BINS
+        if rest < bins[slot]:
+            bins[slot] = rest
+    return bins
+
+
+def find_clusters(shingle_sets: List[Set[int]], threshold: float) -> List[List[int]]:
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    empty_band = (EMPTY_BIN,) * BAND_ROWS
+    for index, shingles in enumerate(shingle_sets):
+        bins = signature(shingles)
+        bands = zip(*(bins[row::BAND_ROWS] for row in range(BAND_ROWS)))
+        for band, rows in enumerate(bands):
+            if rows != empty_band:
+                buckets.setdefault((band, rows), []).append(index)
+
+    parent = list(range(len(shingle_sets)))
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    collisions: Counter = Counter()
+    for members in buckets.values():
+        if 1 < len(members) <= MAX_BUCKET_SIZE:
+            collisions.update(combinations(members, 2))
+    for (left, right), count in collisions.items():
+        smallest = min(len(shingle_sets[left]), len(shingle_sets[right]))
+        if count < min(MIN_BAND_COLLISIONS, smallest) or find(left) == find(right):
+            continue
+        if containment(shingle_sets[left], shingle_sets[right]) >= threshold:
+            parent[find(right)] = find(left)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(shingle_sets)):
+        groups.setdefault(find(index), []).append(index)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+
+def containment(left: Set[int], right: Set[int]) -> float:
+    shared = len(left & right)
+    if shared < min(MIN_SHARED_SHINGLES, len(left), len(right)) or not shared:
+        return 0.0
+    return shared / min(len(left), len(right))
+
+
+def _story_text(source: Optional[str], item: Dict[str, Any]) -> str:
+    if source == "x":
+        return str(item.get("text") or "")
+    title = str(item.get("title") or "")
+    lead = str(item.get("summary") or "")[:SUMMARY_LEAD_CHARS]
+    return f"{title} {lead}".strip()
+
+
+def _label(inputs: List[Dict[str, Any]], ref: Tuple[int, int]) -> str:
+    source = inputs[ref[0]].get("source")
+    item = inputs[ref[0]]["items"][ref[1]]
+    if source == "x":
+        return f"@{item.get('author', '')}"
+    return str(item.get("source_name") or source or "")
+
+
+def _attribution(inputs: List[Dict[str, Any]], refs: List[Tuple[int, int]]) -> List[str]:
+    names: List[str] = []
+    for ref in refs:
+        for name in [_label(inputs, ref), *inputs[ref[0]]["items"][ref[1]].get("also_reported_by", [])]:
+            if name and name not in names:
+                names.append(name)
+    return names
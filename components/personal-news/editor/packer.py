@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+MODEL_TOKEN_BUDGETS = {
+    "gpt-4o-mini": 6000,
+    "gpt-4o": 6000,
+    "gpt-4.1-mini": 8000,
+    "gpt-4.1": 8000,
+}
+DEFAULT_TOKEN_BUDGET = 4000
+INPUT_TOKENS_PER_SECOND = 12
+MIN_TOKEN_BUDGET = 600
+MIN_INPUT_BUDGET = 200
+DEFAULT_ITEM_TOKEN_CAP = 220
+MIN_ITEM_TOKENS = 24
+DEFAULT_MAX_ITEMS_PER_SOURCE = 5
+SOURCE_ITEM_LIMITS = {"weather": 1}
+SOURCE_BASE_SCORES = {"weather": 10.0}
+CORROBORATION_BONUS = 0.1
+RECENCY_HALF_LIFE_HOURS = 12.0
+UNDATED_RECENCY_SCORE = 0.25
+
+TEXT_FIELDS = {
+    "rss": ("title", "summary"),
+    "x": ("text",),
+    "weather": ("summary",),
+}
+META_FIELDS = {
+    "rss": ("published_at", "source_name", "also_reported_by"),
+    "x": ("author", "engagement", "created_at", "also_reported_by"),
+    "weather": (),
+}
+FIELD_ORDER = {
+    "rss": ("title", "summary", "published_at", "source_name", "also_reported_by"),
+    "x": ("author", "text", "engagement", "created_at", "also_reported_by"),
+    "weather": ("summary",),
+}
+TIME_FIELDS = ("published_at", "created_at", "received_at", "start")
+
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯＀-￯　-〿]")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def prompt_token_budget(config: Dict[str, Any], model: str) -> int:
+    if config.get("llm_prompt_token_budget"):
+        return int(config["llm_prompt_token_budget"])
+    budgets = {**MODEL_TOKEN_BUDGETS, **(config.get("llm_model_token_budgets") or {})}
+    budget = int(budgets.get(model, DEFAULT_TOKEN_BUDGET))
+    duration = config.get("max_duration_seconds")
+    if duration:
+        budget = min(budget, max(MIN_TOKEN_BUDGET, int(float(duration) * INPUT_TOKENS_PER_SECOND)))
+    return budget
+
+
+def pack_inputs(
+    inputs: List[Dict[str, Any]],
+    config: Dict[str, Any],
+    budget: int,
+    now: Optional[datetime] = None,
+    report: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    item_cap = int(config.get("llm_item_token_cap", DEFAULT_ITEM_TOKEN_CAP))
+    max_per_source = int(config.get("llm_max_items_per_source", DEFAULT_MAX_ITEMS_PER_SOURCE))
+    candidates: List[Tuple[float, int, int, str, Dict[str, Any]]] = []
+    for block_index, block in enumerate(inputs):
+        source = block.get("source")
+        for position, item in enumerate(block.get("items", []) or []):
+            candidates.append((item_score(source, item, now), block_index, position, source, item))
+    candidates.sort(key=lambda entry: (-entry[0], entry[1], entry[2]))
+
+    remaining = max(budget, MIN_INPUT_BUDGET)
+    chosen: Dict[int, List[Dict[str, Any]]] = {}
+    refs: List[Tuple[int, int]] = []
+    for _, block_index, position, source, item in candidates:
+        packed_items = chosen.setdefault(block_index, [])
+        if len(packed_items) >= SOURCE_ITEM_LIMITS.get(source, max_per_source):
+            continue
+        cap = min(item_cap, remaining)
+        if cap < MIN_ITEM_TOKENS:
+            break
+        packed = fit_item(source, item, cap)
+        cost = _item_tokens(packed)
+        if cost > remaining:
+            continue
+        remaining -= cost
+        packed_items.append(packed)
+        refs.append((block_index, position))
+    if report is not None:
+        report["chosen"] = refs
+    return [
+        {"source": block.get("source"), "items": chosen.get(index, [])}
+        for index, block in enumerate(inputs)
+    ]
+
+
+def item_score(source: Optional[str], item: Dict[str, Any], now: datetime) -> float:
+    if isinstance(item.get("score"), (int, float)):
+        return float(item["score"])
+    score = SOURCE_BASE_SCORES.get(source or "", 0.0)
+    score += _recency(item, now)
+    engagement = item.get("engagement") or {}
+    if isinstance(engagement, dict):
+        interactions = float(engagement.get("likes", 0) or 0) + 2 * float(engagement.get("retweets", 0) or 0)
+        score += min(math.log10(1 + interactions) / 5, 0.5)
+    score += CORROBORATION_BONUS * len(item.get("also_reported_by") or [])
+    return score
+
+
+def fit_item(source: Optional[str], item: Dict[str, Any], cap: int) -> Dict[str, Any]:
+    text_fields, meta_fields = _fields(source, item)
+    packed: Dict[str, Any] = {field: item.get(field) for field in meta_fields if field in item}
+    remaining = cap - _item_tokens(packed) - 2 * len(text_fields)
+    texts = {field: str(item.get(field) or "") for field in text_fields}
+    ordered = sorted(text_fields, key=lambda field: estimate_tokens(texts[field]))
+    for index, field in enumerate(ordered):
+        share = max(remaining, 0) // (len(ordered) - index)
+        packed[field] = _truncate_tokens(texts[field], share)
+        remaining -= estimate_tokens(packed[field])
+    order = FIELD_ORDER.get(source or "", tuple(item))
+    return {field: packed[field] for field in order if field in packed}
+
+
+def _fields(source: Optional[str], item: Dict[str, Any]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    if source in TEXT_FIELDS:
+        return TEXT_FIELDS[source], META_FIELDS[source]
+    text = tuple(key for key, value in item.items() if isinstance(value, str) and key not in TIME_FIELDS)
+    meta = tuple(key for key in item if key not in text and key != "score")
+    return text, meta
+
+
+def _truncate_tokens(text: str, limit: int) -> str:
+    if estimate_tokens(text) <= limit:
+        return text
+    if limit <= 1:
+        return ""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) + 1 <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "…"
+
+
+def _item_tokens(item: Dict[str, Any]) -> int:
+    return estimate_tokens(json.dumps(item, ensure_ascii=False))
+
+
+def _recency(item: Dict[str, Any], now: datetime) -> float:
+    for field in TIME_FIELDS:
+        value = item.get(field)
+        if not value:
+            continue
+        try:
+            moment = datetime.fromisoformat(str(value))
+        except ValueError:
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        age_hours = abs((now - moment).total_seconds()) / 3600
+        return 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+    return UNDATED_RECENCY_SCORE
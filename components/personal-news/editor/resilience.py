@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import requests
+
+DEFAULT_API_BASE = "https://api.openai.com"
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TIMEOUT_SECONDS = 30.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE_SECONDS = 0.5
+DEFAULT_BACKOFF_MAX_SECONDS = 8.0
+DEFAULT_RETRY_BUDGET_SECONDS = 30.0
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+HEDGE_WORKERS = 8
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+Target = Tuple[str, str]
+Send = Callable[[str, str], requests.Response]
+
+_LATENCIES: Dict[Target, Deque[float]] = {}
+_STATS = {"requests": 0, "retries": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_sleep = time.sleep
+
+
+def parse_targets(base_value: Optional[str], model_value: Optional[str]) -> List[Target]:
+    bases = _split(base_value) or [DEFAULT_API_BASE]
+    models = _split(model_value) or [DEFAULT_MODEL]
+    count = max(len(bases), len(models))
+    targets: List[Target] = []
+    for index in range(count):
+        target = (bases[min(index, len(bases) - 1)], models[min(index, len(models) - 1)])
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def call_with_failover(targets: List[Target], send: Send, config: Dict[str, Any]) -> requests.Response:
+    retries = max(int(config.get("llm_max_retries", DEFAULT_MAX_RETRIES)), 0)
+    budget = float(config.get("llm_retry_budget_seconds", DEFAULT_RETRY_BUDGET_SECONDS))
+    waited = 0.0
+    last_error: Optional[requests.RequestException] = None
+    for position, target in enumerate(targets):
+        if position:
+            _bump("failovers")
+        last_target = position == len(targets) - 1
+        for attempt in range(retries + 1):
+            if attempt:
+                _bump("retries")
+            try:
+                response = _send_hedged(target, send, config)
+            except requests.RequestException as exc:
+                last_error = exc
+                if attempt < retries:
+                    delay = retry_delay(attempt, config)
+                    if waited + delay > budget:
+                        break
+                    _sleep(delay)
+                    waited += delay
+                continue
+            if response.status_code not in RETRY_STATUSES or (attempt == retries and last_target):
+                return response
+            if attempt == retries:
+                _close(response)
+                continue
+            retry_after = (getattr(response, "headers", None) or {}).get("Retry-After")
+            delay = retry_delay(attempt, config, retry_after)
+            if waited + delay > budget:
+                if last_target:
+                    return response
+                _close(response)
+                break
+            _close(response)
+            _sleep(delay)
+            waited += delay
+    if last_error is None:
+        raise RuntimeError("LLM API unavailable")
+    raise last_error
+
+
+def retry_delay(attempt: int, config: Dict[str, Any], retry_after: Optional[str] = None) -> float:
+    ceiling = float(config.get("llm_backoff_max_seconds", DEFAULT_BACKOFF_MAX_SECONDS))
+    hinted = _parse_retry_after(retry_after)
+    if hinted is not None:
+        return hinted
+    base = float(config.get("llm_backoff_base_seconds", DEFAULT_BACKOFF_BASE_SECONDS))
+    return random.uniform(0, min(ceiling, base * (2 ** attempt)))
+
+
+def record_latency(target: Target, seconds: float) -> None:
+    with _LOCK:
+        window = _LATENCIES.setdefault(target, deque(maxlen=LATENCY_WINDOW))
+        window.append(seconds)
+
+
+def latency_percentile(target: Target, percentile: float, min_samples: int = 1) -> Optional[float]:
+    with _LOCK:
+        samples = sorted(_LATENCIES.get(target, ()))
+    if not samples or len(samples) < min_samples:
+        return None
+    rank = min(int(len(samples) * percentile / 100), len(samples) - 1)
+    return samples[rank]
+
+
+def llm_call_stats() -> Dict[str, int]:
+    with _LOCK:
+        return dict(_STATS)
+
+
+def reset_llm_call_state() -> None:
+    with _LOCK:
+        _LATENCIES.clear()
+        for name in _STATS:
+            _STATS[name] = 0
+
+
+def _send_hedged(target: Target, send: Send, config: Dict[str, Any]) -> requests.Response:
+    _bump("requests")
+    delay = None
+    if config.get("llm_hedge_enabled", False):
+        delay = latency_percentile(
+            target,
+            float(config.get("llm_hedge_percentile", DEFAULT_HEDGE_PERCENTILE)),
+            int(config.get("llm_hedge_min_samples", DEFAULT_HEDGE_MIN_SAMPLES)),
+        )
+    if delay is None:
+        return _timed(target, send)
+    executor = _executor()
+    primary = executor.submit(_timed, target, send)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    _bump("hedges")
+    hedge = executor.submit(_timed, target, send)
+    pending = {primary, hedge}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response = future.result()
+            except requests.RequestException as exc:
+                error = exc
+                continue
+            for loser in pending:
+                loser.add_done_callback(_discard)
+            if future is hedge:
+                _bump("hedge_wins")
+            return response
+    if error is None:
+        raise RuntimeError("LLM API unavailable")
+    raise error
+
+
+def _timed(target: Target, send: Send) -> requests.Response:
+    started = time.monotonic()
+    response = send(*target)
+    if response.status_code < 400:
+        record_latency(target, time.monotonic() - started)
+    return response
+
+
+def _discard(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        _close(future.result())
+
+
+def _close(response: Any) -> None:
+    close = getattr(response, "close", None)
+    if close is not None:
+        close()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+        return _EXECUTOR
+
+
+def _bump(name: str) -> None:
+    with _LOCK:
+        _STATS[name] += 1
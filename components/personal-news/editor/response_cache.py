@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from utils import LRUCache, read_json, resolve_cache_dir, write_json
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_TEMPERATURE = 0.3
+
+_MEMORY = LRUCache(DEFAULT_MAX_ENTRIES)
+_DISK_STATS = {"disk_hits": 0, "stores": 0, "bypassed": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def cache_key(prompt_text: str, compact: Dict[str, Any], model: str, temperature: float) -> str:
+    material = json.dumps(
+        [prompt_text, compact, model, round(float(temperature), 4)],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(config: Dict[str, Any], temperature: float) -> bool:
+    if config.get("llm_cache_bypass", False):
+        return False
+    limit = float(config.get("llm_cache_max_temperature", DEFAULT_MAX_TEMPERATURE))
+    return temperature <= limit
+
+
+def load_response(config: Dict[str, Any], key: str) -> Optional[str]:
+    text = _MEMORY.get(key)
+    if text is not None:
+        return text
+    directory = resolve_cache_dir(config, "llm")
+    if directory is None:
+        return None
+    data = read_json(directory / f"{key}.json")
+    if not isinstance(data, dict) or not isinstance(data.get("content"), str):
+        return None
+    _MEMORY.set(key, data["content"])
+    _bump("disk_hits")
+    return data["content"]
+
+
+def store_response(config: Dict[str, Any], key: str, content: str, messages: List[Dict[str, str]]) -> None:
+    _MEMORY.set(key, content)
+    _bump("stores")
+    directory = resolve_cache_dir(config, "llm")
+    if directory is not None:
+        write_json(directory / f"{key}.json", {"content": content, "prompt_chars": _chars(messages)})
+
+
+def record_bypass() -> None:
+    _bump("bypassed")
+
+
+def response_cache_stats() -> Dict[str, int]:
+    stats = _MEMORY.stats()
+    with _STATS_LOCK:
+        stats.update(_DISK_STATS)
+    return stats
+
+
+def reset_response_cache() -> None:
+    _MEMORY.clear()
+    with _STATS_LOCK:
+        for key in _DISK_STATS:
+            _DISK_STATS[key] = 0
+
+
+def _chars(messages: List[Dict[str, str]]) -> int:
+    return sum(len(message.get("content", "")) for message in messages)
+
+
+def _bump(name: str) -> None:
+    with _STATS_LOCK:
+        _DISK_STATS[name] += 1
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SCORED_SOURCES = ("rss", "x")
+DEFAULT_WEIGHTS = {"relevance": 1.0, "recency": 0.6, "engagement": 0.3}
+DEFAULT_HALF_LIFE_HOURS = 12.0
+DEFAULT_TOP_N = 20
+UNDATED_AGE_HOURS = 24.0
+
+SEPARATOR = "\x1f"
+CJK_RANGES = ((0x3040, 0x30FF), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xAC00, 0xD7AF))
+HASH_MODULUS = 1 << 64
+HASH_BASE = 1_000_003
+
+_TOKEN = re.compile(r"[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def load_interest_profile(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else None
+
+
+def score_inputs(
+    inputs: List[Dict[str, Any]],
+    profile: Dict[str, Any],
+    top_n: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    refs = []
+    for block_index, block in enumerate(inputs):
+        if block.get("source") not in SCORED_SOURCES:
+            continue
+        for position, item in enumerate(block.get("items", []) or []):
+            refs.append((block_index, position, block["source"], item))
+    if not refs:
+        return inputs
+    scores = score_items([(source, item) for _, _, source, item in refs], profile, now)
+    top_n = int(top_n or profile.get("top_n", DEFAULT_TOP_N))
+    keep = set(np.argsort(-scores, kind="stable")[:top_n].tolist())
+
+    scored: Dict[int, List[tuple]] = {}
+    for index, (block_index, position, _, item) in enumerate(refs):
+        if index in keep:
+            scored.setdefault(block_index, []).append(
+                (-scores[index], position, {**item, "score": round(float(scores[index]), 4)})
+            )
+    result = []
+    for block_index, block in enumerate(inputs):
+        if block.get("source") not in SCORED_SOURCES:
+            result.append(block)
+            continue
+        items = [entry[2] for entry in sorted(scored.get(block_index, []), key=lambda e: e[:2])]
+        result.append({**block, "items": items})
+    return result
+
+
+def score_items(
+    items: List[tuple],
+    profile: Dict[str, Any],
+    now: datetime,
+) -> np.ndarray:
+    weights = {**DEFAULT_WEIGHTS, **(profile.get("weights") or {})}
+    keywords = {str(term).lower(): float(weight) for term, weight in (profile.get("keywords") or {}).items()}
+    texts = [_item_text(source, item).lower().replace(SEPARATOR, " ") for source, item in items]
+
+    relevance = np.zeros(len(items))
+    if keywords:
+        terms = list(keywords)
+        counts, lengths = _term_counts(texts, terms)
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(items)) / (1 + document_frequency)) + 1.0
+        tf = np.log1p(counts) / np.log2(1 + lengths)[:, None]
+        relevance = (tf * idf) @ np.array([keywords[term] for term in terms])
+        if relevance.max() > 0:
+            relevance = relevance / relevance.max()
+
+    half_life = float(profile.get("half_life_hours", DEFAULT_HALF_LIFE_HOURS))
+    ages = np.array([_age_hours(item, now) for _, item in items])
+    recency = np.power(0.5, ages / half_life)
+
+    interactions = np.array([_interactions(item) for _, item in items])
+    engagement = np.log1p(interactions)
+    if engagement.max() > 0:
+        engagement = engagement / engagement.max()
+
+    return (
+        weights["relevance"] * relevance
+        + weights["recency"] * recency
+        + weights["engagement"] * engagement
+    )
+
+
+def _term_counts(texts: List[str], terms: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    codes = np.frombuffer(SEPARATOR.join(texts).encode("utf-32-le"), dtype=np.uint32)
+    starts, ends = _token_spans(codes)
+    separators = np.flatnonzero(codes == ord(SEPARATOR))
+    boundaries = np.concatenate(([0], separators, [len(codes)]))
+    lengths = np.diff(np.searchsorted(starts, boundaries)).astype(float) + 1
+    counts = np.zeros((len(texts), len(terms)))
+
+    vocabulary: Dict[str, int] = {}
+    patterns = []
+    for column, term in enumerate(terms):
+        tokens = _TOKEN.findall(term)
+        if tokens:
+            patterns.append((column, [vocabulary.setdefault(token, len(vocabulary) + 1) for token in tokens]))
+    if not patterns or not len(starts):
+        return counts, lengths
+
+    widths = ends - starts
+    firsts = codes[starts]
+    width_ok = np.zeros(max(map(len, vocabulary)) + 2, dtype=bool)
+    first_ok = np.zeros(max(ord(token[0]) for token in vocabulary) + 2, dtype=bool)
+    for token in vocabulary:
+        width_ok[len(token)] = first_ok[ord(token[0])] = True
+    candidates = np.flatnonzero(
+        width_ok[np.minimum(widths, len(width_ok) - 1)] & first_ok[np.minimum(firsts, len(first_ok) - 1)]
+    )
+    by_hash = {_token_hash(token): token_id for token, token_id in vocabulary.items()}
+    keys = np.array(sorted(by_hash), dtype=np.uint64)
+    key_ids = np.array([by_hash[int(key)] for key in keys])
+    hashes = _span_hashes(codes, starts[candidates], ends[candidates])
+    slots = np.minimum(np.searchsorted(keys, hashes), len(keys) - 1)
+    stream = np.zeros(len(starts), dtype=np.int64)
+    stream[candidates] = np.where(keys[slots] == hashes, key_ids[slots], 0)
+    matches = np.flatnonzero(stream)
+    rows = np.zeros(len(starts), dtype=np.int64)
+    rows[matches] = np.searchsorted(separators, starts[matches])
+    for column, ids in patterns:
+        positions = matches[stream[matches] == ids[0]]
+        positions = positions[positions + len(ids) <= len(stream)]
+        for offset, token_id in enumerate(ids[1:], start=1):
+            keep = (stream[positions + offset] == token_id) & (rows[positions + offset] == rows[positions])
+            positions = positions[keep]
+        counts[:, column] = np.bincount(rows[positions], minlength=len(texts))
+    return counts, lengths
+
+
+def _token_spans(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    latin = ((codes >= 97) & (codes <= 122)) | ((codes >= 48) & (codes <= 57))
+    cjk = np.zeros(len(codes), dtype=bool)
+    wide = np.flatnonzero(codes >= CJK_RANGES[0][0])
+    for low, high in CJK_RANGES:
+        cjk[wide[(codes[wide] >= low) & (codes[wide] <= high)]] = True
+    previous = np.concatenate(([False], latin[:-1]))
+    following = np.concatenate((latin[1:], [False]))
+    latin_start = latin & ~previous
+    starts = np.flatnonzero(latin_start | cjk)
+    ends = starts + 1
+    ends[latin_start[starts]] = np.flatnonzero(latin & ~following) + 1
+    return starts, ends
+
+
+def _span_hashes(codes: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    widths = ends - starts
+    offsets = np.cumsum(widths) - widths
+    local = np.arange(int(widths.sum())) - np.repeat(offsets, widths)
+    powers = np.full(int(widths.max()), HASH_BASE, dtype=np.uint64)
+    powers[0] = 1
+    powers = np.cumprod(powers)
+    chars = codes[np.repeat(starts, widths) + local].astype(np.uint64)
+    return np.add.reduceat(chars * powers[local], offsets)
+
+
+def _token_hash(token: str) -> int:
+    value = 0
+    for position, char in enumerate(token):
+        value = (value + ord(char) * pow(HASH_BASE, position, HASH_MODULUS)) % HASH_MODULUS
+    return value
+
+
+def _item_text(source: str, item: Dict[str, Any]) -> str:
+    if source == "x":
+        return str(item.get("text") or "")
+    return f"{item.get('title') or ''} {item.get('summary') or ''}"
+
+
+def _age_hours(item: Dict[str, Any], now: datetime) -> float:
+    value = item.get("published_at") or item.get("created_at")
+    if not value:
+        return UNDATED_AGE_HOURS
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return UNDATED_AGE_HOURS
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((now - moment).total_seconds() / 3600, 0.0)
+
+
+def _interactions(item: Dict[str, Any]) -> float:
+    engagement = item.get("engagement") or {}
+    if not isinstance(engagement, dict):
+        return 0.0
+    return float(engagement.get("likes", 0) or 0) + 2 * float(engagement.get("retweets", 0) or 0)
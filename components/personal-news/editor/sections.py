@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from editor.client import _prepare_call, complete
+from editor.dedupe import DEFAULT_SOURCE_PRIORITY, collapse_duplicates
+
+SECTION_PROMPT = "section_prompt.txt"
+ASSEMBLE_PROMPT = "assemble_prompt.txt"
+SECTION_TITLES = {
+    "rss": "今日要闻",
+    "x": "与我相关的动态",
+    "weather": "天气情况",
+}
+SECTION_ORDER = ("rss", "x", "weather")
+
+
+def generate_section_script(
+    block: Dict[str, Any],
+    config: Dict[str, Any],
+    use_cache: bool = True,
+    report: Optional[Dict[str, Any]] = None,
+    budget_share: float = 1.0,
+) -> str:
+    source = block.get("source", "")
+    payload = {
+        "config": config,
+        "section": SECTION_TITLES.get(source, source),
+        "inputs": [block],
+    }
+    return complete(_prepare_call(payload, use_cache, SECTION_PROMPT, report=report, budget_share=budget_share))
+
+
+def assemble_broadcast_script(
+    sections: Dict[str, str],
+    config: Dict[str, Any],
+    use_cache: bool = True,
+) -> str:
+    ordered = [
+        {"section": SECTION_TITLES.get(source, source), "script": sections[source]}
+        for source in _ordered_sources(sections)
+        if sections[source]
+    ]
+    if not ordered:
+        raise RuntimeError("No sections to assemble")
+    payload = {"config": config, "sections": ordered}
+    return complete(_prepare_call(payload, use_cache, ASSEMBLE_PROMPT, shrink=False))
+
+
+def generate_sectioned_script(payload: Dict[str, Any], use_cache: bool = True) -> str:
+    config = payload.get("config", {}) or {}
+    inputs = payload.get("inputs", []) or []
+    if config.get("dedupe_enabled", True):
+        inputs = collapse_duplicates(inputs, config)
+    blocks = [block for block in inputs if block.get("items")]
+    if not blocks:
+        raise RuntimeError("No inputs to generate")
+    share = 1.0 / len(blocks)
+    with ThreadPoolExecutor(max_workers=len(blocks), thread_name_prefix="editor-section") as executor:
+        scripts = list(
+            executor.map(lambda block: generate_section_script(block, config, use_cache, budget_share=share), blocks)
+        )
+    sections = {block.get("source", ""): script for block, script in zip(blocks, scripts)}
+    return assemble_broadcast_script(sections, config, use_cache)
+
+
+def drop_sent_duplicates(
+    block: Dict[str, Any],
+    sent: List[Dict[str, Any]],
+    config: Dict[str, Any],
+) -> Dict[str, Any]:
+    if not sent or not config.get("dedupe_enabled", True):
+        return block
+    allowed = list(config.get("dedupe_source_priority") or DEFAULT_SOURCE_PRIORITY)
+    order = [entry.get("source") for entry in [*sent, block]]
+    priority = [source for source in dict.fromkeys(order) if source in allowed]
+    return collapse_duplicates([*sent, block], {**config, "dedupe_source_priority": priority})[-1]
+
+
+def _ordered_sources(sections: Dict[str, str]) -> List[str]:
+    known = [source for source in SECTION_ORDER if source in sections]
+    return known + [source for source in sections if source not in SECTION_ORDER]
@@ -3,10 +3,23 @@ from __future__ import annotations
 import importlib.util
 import json
 import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from editor.scoring import load_interest_profile, score_inputs  # noqa: E402
+from editor.sections import (  # noqa: E402
+    assemble_broadcast_script,
+    drop_sent_duplicates,
+    generate_section_script,
+)
+from utils import http_client  # noqa: E402
 
 
 def _load_module(path: Path, name: str):
@@ -28,35 +41,164 @@ fetch_weather = weather_module.fetch_weather
 fetch_x_items = x_module.fetch_x_items
 generate_broadcast_script = editor_module.generate_broadcast_script
 
+DEFAULT_MAX_COLLECT_SECONDS = 60.0
+RSS_DEADLINE_SHARE = 0.6
+RSS_FULL_TEXT_SHARE = 0.2
+
+PARTIAL_REPORT_FIELDS = {
+    "rss": ("timed_out", "full_text_timed_out"),
+    "x": ("deferred",),
+}
+
+SECTION_FETCHERS = (
+    ("rss", fetch_rss_items),
+    ("x", fetch_x_items),
+    ("weather", fetch_weather),
+)
+
 
 def load_config(path: Path) -> Dict[str, Any]:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
 def build_inputs(config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    inputs: List[Dict[str, Any]] = []
-    rss_items = fetch_rss_items(config)
-    if rss_items:
-        inputs.append({"source": "rss", "items": rss_items})
-    x_items = fetch_x_items(config)
-    if x_items:
-        inputs.append({"source": "x", "items": x_items})
-    weather_items = fetch_weather(config)
-    if weather_items:
-        inputs.append({"source": "weather", "items": weather_items})
+    inputs, _ = collect_inputs(config)
     return inputs
 
 
+def collect_inputs(config: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    budget = float(config.get("max_collect_seconds", DEFAULT_MAX_COLLECT_SECONDS) or 0)
+    started = time.monotonic()
+    source_config = dict(config)
+    if budget > 0:
+        rss_deadline = float(
+            config.get("rss_fetch_deadline_seconds", rss_module.DEFAULT_FETCH_DEADLINE_SECONDS)
+        )
+        source_config["rss_fetch_deadline_seconds"] = min(rss_deadline, budget * RSS_DEADLINE_SHARE)
+        full_text_deadline = float(
+            config.get("rss_full_text_deadline_seconds", rss_module.DEFAULT_FULL_TEXT_DEADLINE_SECONDS)
+        )
+        source_config["rss_full_text_deadline_seconds"] = min(
+            full_text_deadline, budget * RSS_FULL_TEXT_SHARE
+        )
+    futures = {
+        source: _spawn(_collect_source, source, fetch, source_config) for source, fetch in SECTION_FETCHERS
+    }
+    wait(futures.values(), timeout=budget if budget > 0 else None)
+    inputs: List[Dict[str, Any]] = []
+    report: Dict[str, Any] = {"dropped": [], "failed": [], "partial": []}
+    for source, future in futures.items():
+        if not future.done():
+            report["dropped"].append(source)
+            continue
+        try:
+            items, partial = future.result()
+        except Exception:  # noqa: BLE001
+            report["failed"].append(source)
+            continue
+        if partial:
+            report["partial"].append(source)
+        if items:
+            inputs.append({"source": source, "items": items})
+    report["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    return inputs, report
+
+
+def _collect_source(source: str, fetch: Any, config: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+    if source not in PARTIAL_REPORT_FIELDS:
+        return fetch(config), False
+    report: Dict[str, Any] = {}
+    items = fetch(config, report=report)
+    return items, any(report.get(field) for field in PARTIAL_REPORT_FIELDS[source])
+
+
+def _spawn(fn: Any, *args: Any) -> Future:
+    future: Future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as exc:  # noqa: BLE001
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name=f"collect-{args[0]}", daemon=True).start()
+    return future
+
+
+def rank_inputs(config: Dict[str, Any], inputs: List[Dict[str, Any]], config_dir: Path) -> List[Dict[str, Any]]:
+    profile_path = config_dir / config.get("interest_profile", "interest_profile.json")
+    profile = load_interest_profile(profile_path)
+    if not profile:
+        return inputs
+    return score_inputs(inputs, profile, top_n=config.get("score_top_n"))
+
+
+def mark_inputs_seen(config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> None:
+    by_source: Dict[str, List[Dict[str, Any]]] = {"rss": [], "x": []}
+    for block in inputs:
+        if block.get("source") in by_source:
+            by_source[block["source"]].extend(block.get("items", []))
+    rss_module.mark_rss_items_seen(by_source["rss"], config)
+    x_module.mark_x_items_seen(by_source["x"], config)
+
+
+def generate_pipelined(config: Dict[str, Any], config_dir: Path) -> str:
+    used: Dict[str, List[Dict[str, Any]]] = {}
+    sent: List[Dict[str, Any]] = []
+    sent_lock = threading.Lock()
+    share = 1.0 / len(SECTION_FETCHERS)
+
+    def run(source: str, fetch: Any) -> str:
+        try:
+            return build_section(source, fetch)
+        except Exception as exc:  # noqa: BLE001
+            failure = {"section_failed": source, "error": str(exc)}
+            print(json.dumps(failure, ensure_ascii=False), file=sys.stderr)
+            return ""
+
+    def build_section(source: str, fetch: Any) -> str:
+        items = fetch(config)
+        if not items:
+            return ""
+        inputs = rank_inputs(config, [{"source": source, "items": items}], config_dir)
+        with sent_lock:
+            block = drop_sent_duplicates(inputs[0], list(sent), config)
+            sent.append(block)
+        if not block["items"]:
+            return ""
+        section_report: Dict[str, Any] = {}
+        section = generate_section_script(block, config, report=section_report, budget_share=share)
+        used[source] = section_report.get("inputs", [])
+        return section
+
+    with ThreadPoolExecutor(max_workers=len(SECTION_FETCHERS), thread_name_prefix="pipeline") as executor:
+        futures = {source: executor.submit(run, source, fetch) for source, fetch in SECTION_FETCHERS}
+        sections = {source: future.result() for source, future in futures.items()}
+    script = assemble_broadcast_script(sections, config)
+    mark_inputs_seen(config, [block for blocks in used.values() for block in blocks])
+    return script
+
+
 def main() -> None:
     if len(sys.argv) < 2:
         print("Usage: python personal-news/main.py <config.json>", file=sys.stderr)
         sys.exit(1)
     config_path = Path(sys.argv[1]).resolve()
     config = load_config(config_path)
-    inputs = build_inputs(config)
+    http_client.configure_from_config(config)
+    if config.get("pipeline_sections", False):
+        print(generate_pipelined(config, config_path.parent))
+        return
+    inputs, report = collect_inputs(config)
+    print(json.dumps({"collect": report}, ensure_ascii=False), file=sys.stderr)
+    inputs = rank_inputs(config, inputs, config_path.parent)
     payload = {"config": config, "inputs": inputs}
-    script = generate_broadcast_script(payload)
+    generation: Dict[str, Any] = {}
+    script = generate_broadcast_script(payload, report=generation)
     print(script)
+    mark_inputs_seen(config, generation.get("inputs", []))
 
 
 if __name__ == "__main__":
@@ -2,13 +2,13 @@ from __future__ import annotations
 
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from editor.client import generate_broadcast_script  # noqa: E402
+from editor.client import generate_broadcast_script, stream_broadcast_script  # noqa: E402
 
 
 def generate_broadcast(config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> str:
@@ -16,5 +16,9 @@ def generate_broadcast(config: Dict[str, Any], inputs: List[Dict[str, Any]]) ->
     return generate_broadcast_script(payload)
 
 
-__all__ = ["generate_broadcast"]
+def stream_broadcast(config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> Iterator[str]:
+    payload = {"config": config or {}, "inputs": inputs or []}
+    return stream_broadcast_script(payload)
+
 
+__all__ = ["generate_broadcast", "stream_broadcast"]
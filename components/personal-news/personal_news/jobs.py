@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from editor.client import stream_broadcast_script  # noqa: E402
+from personal_news.sse import sse_event  # noqa: E402
+from utils import BoundedWorkerPool, PoolFull  # noqa: E402
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_JOB_QUEUE = 64
+DEFAULT_MAX_JOBS = 256
+DEFAULT_TTL_SECONDS = 3600.0
+KEEPALIVE_SECONDS = 15.0
+
+
+class Job:
+    def __init__(self, config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> None:
+        self.id = uuid.uuid4().hex
+        self.config = config
+        self.inputs = inputs
+        self.status = QUEUED
+        self.chunks: List[str] = []
+        self.script: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": {"chunks": len(self.chunks), "chars": sum(len(chunk) for chunk in self.chunks)},
+            "script": self.script,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        max_queue: int = DEFAULT_JOB_QUEUE,
+        max_jobs: int = DEFAULT_MAX_JOBS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        pool: Optional[BoundedWorkerPool] = None,
+    ) -> None:
+        self._owns_pool = pool is None
+        self.pool = pool or BoundedWorkerPool(max_workers, max_queue, name="job")
+        self.max_jobs = max(int(max_jobs), 1)
+        self.ttl_seconds = float(ttl_seconds)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._changed = threading.Condition()
+        self._stats = {"expired": 0, "evicted": 0}
+
+    def submit(self, config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        job = Job(config, inputs)
+        with self._changed:
+            self._expire()
+            self._make_room()
+            self._jobs[job.id] = job
+        try:
+            self.pool.submit(self._run, job)
+        except PoolFull:
+            with self._changed:
+                self._jobs.pop(job.id, None)
+            raise
+        return job.snapshot()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._changed:
+            self._expire()
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def events(self, job_id: str) -> Iterator[bytes]:
+        with self._changed:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        sent_status = None
+        sent_chunks = 0
+        while True:
+            with self._changed:
+                if job.status == sent_status and len(job.chunks) == sent_chunks:
+                    self._changed.wait(KEEPALIVE_SECONDS)
+                status = job.status
+                chunks = job.chunks[sent_chunks:]
+                snapshot = job.snapshot()
+            if status == sent_status and not chunks:
+                yield b": keepalive\n\n"
+                continue
+            if status != sent_status:
+                sent_status = status
+                yield sse_event({"status": status}, event="status")
+            for chunk in chunks:
+                yield sse_event({"text": chunk})
+            sent_chunks += len(chunks)
+            if status == SUCCEEDED:
+                yield sse_event({"script": snapshot["script"]}, event="done")
+                return
+            if status == FAILED:
+                yield sse_event({"error": snapshot["error"]}, event="error")
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {"stored": len(self._jobs), "by_status": counts, **self._stats, "pool": self.pool.stats()}
+
+    def shutdown(self) -> None:
+        if self._owns_pool:
+            self.pool.shutdown(wait=False)
+
+    def _run(self, job: Job) -> None:
+        self._update(job, status=RUNNING)
+        try:
+            payload = {"config": job.config or {}, "inputs": job.inputs or []}
+            for chunk in stream_broadcast_script(payload):
+                with self._changed:
+                    job.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as exc:  # noqa: BLE001
+            self._update(job, status=FAILED, error=str(exc), finished_at=time.time())
+            return
+        self._update(job, status=SUCCEEDED, script="".join(job.chunks).strip(), finished_at=time.time())
+
+    def _update(self, job: Job, **fields: Any) -> None:
+        with self._changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            self._changed.notify_all()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        self._stats["expired"] += len(expired)
+
+    def _make_room(self) -> None:
+        while len(self._jobs) >= self.max_jobs:
+            finished = next((job_id for job_id, job in self._jobs.items() if job.status in FINISHED), None)
+            if finished is None:
+                raise PoolFull("Job store is full")
+            del self._jobs[finished]
+            self._stats["evicted"] += 1
+
+
+_MANAGER_LOCK = threading.Lock()
+_MANAGER: Optional[JobManager] = None
+
+
+def configure_job_manager(**kwargs: Any) -> JobManager:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is not None:
+            _MANAGER.shutdown()
+        _MANAGER = JobManager(**kwargs)
+        return _MANAGER
+
+
+def get_job_manager() -> JobManager:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is None:
+            _MANAGER = JobManager()
+        return _MANAGER
+
+
+def reset_job_manager() -> None:
+    global _MANAGER
+    with _MANAGER_LOCK:
+        if _MANAGER is not None:
+            _MANAGER.shutdown()
+        _MANAGER = None
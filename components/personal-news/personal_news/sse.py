@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def sse_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            yield sse_event({"text": chunk})
+    except Exception as exc:  # noqa: BLE001
+        yield sse_event({"error": str(exc)}, event="error")
+        return
+    yield sse_event({}, event="done")
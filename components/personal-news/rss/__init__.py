@@ -1,3 +1,18 @@
-from .client import fetch_rss_items
+from .cache import article_cache_stats, feed_cache_stats
+from .client import (
+    feed_health_report,
+    fetch_rss_items,
+    fetch_rss_items_batch,
+    last_fetch_report,
+    mark_rss_items_seen,
+)
 
-__all__ = ["fetch_rss_items"]
+__all__ = [
+    "article_cache_stats",
+    "feed_cache_stats",
+    "feed_health_report",
+    "fetch_rss_items",
+    "fetch_rss_items_batch",
+    "last_fetch_report",
+    "mark_rss_items_seen",
+]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+from xml.etree import ElementTree
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from rss.parser import parse_feed_stream  # noqa: E402
+
+ITEM_TEMPLATE = (
+    "<item><title>Synthetic story {index}</title>"
+    "<description>{body}</description>"
+    "<link>https://example.com/story/{index}</link>"
+    "<pubDate>Mon, 20 Jan 2026 08:00:00 GMT</pubDate></item>"
+)
+
+
+def build_feed(target_bytes: int) -> bytes:
+    body = "Lorem ipsum dolor sit amet. " * 40
+    parts: List[str] = ['<?xml version="1.0" encoding="UTF-8"?><rss><channel><title>Bench</title>']
+    size = len(parts[0])
+    index = 0
+    while size < target_bytes:
+        item = ITEM_TEMPLATE.format(index=index, body=body)
+        parts.append(item)
+        size += len(item)
+        index += 1
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def _chunks(data: bytes, size: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(data), size):
+        yield bytes(view[start : start + size])
+
+
+def _full_tree(data: bytes, max_items: int) -> int:
+    root = ElementTree.fromstring(data.decode("utf-8"))
+    return len(root.findall(".//item")[:max_items])
+
+
+def _streaming(data: bytes, max_items: int) -> int:
+    _, entries = parse_feed_stream(_chunks(data, 64 * 1024), max_items=max_items)
+    return len(entries)
+
+
+def _measure(func: Callable[[bytes, int], int], data: bytes, max_items: int) -> Tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(data, max_items)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def run(size_mb: int, max_items: int) -> Dict[str, Dict[str, float]]:
+    data = build_feed(size_mb * 1024 * 1024)
+    results = {}
+    for name, func in (("full_tree", _full_tree), ("streaming", _streaming)):
+        elapsed, peak, count = _measure(func, data, max_items)
+        results[name] = {
+            "seconds": round(elapsed, 4),
+            "peak_mb": round(peak / 1024 / 1024, 2),
+            "items": count,
+        }
+    return results
+
+
+def _cli() -> None:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark RSS parsing on a synthetic feed")
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--max-items", type=int, default=30)
+    args = parser.parse_args()
+    print(json.dumps(run(args.size_mb, args.max_items), indent=2))
+
+
+if __name__ == "__main__":
+    _cli()
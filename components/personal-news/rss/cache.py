@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils import LRUCache, read_json, resolve_cache_dir, write_json
+
+ARTICLE_CACHE_SIZE = 512
+
+_STATS = {"hits": 0, "misses": 0, "stores": 0}
+_STATS_LOCK = threading.Lock()
+_CACHES: Dict[Optional[Path], "FeedCache"] = {}
+_CACHES_LOCK = threading.Lock()
+_ARTICLES = LRUCache(ARTICLE_CACHE_SIZE)
+
+
+class FeedCache:
+    def __init__(self, directory: Optional[Path]) -> None:
+        self._directory = directory
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(url)
+        if entry is not None or self._directory is None:
+            return entry
+        data = read_json(self._path(url))
+        if not isinstance(data, dict) or data.get("url") != url:
+            return None
+        with self._lock:
+            self._memory[url] = data
+        return data
+
+    def store(self, url: str, headers: Any, items: List[Dict[str, Any]]) -> None:
+        entry = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "items": items,
+        }
+        with self._lock:
+            self._memory[url] = entry
+        if self._directory is not None:
+            write_json(self._path(url), entry)
+        _bump("stores")
+
+    def _path(self, url: str) -> Path:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self._directory / f"{digest}.json"
+
+
+def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    if not entry:
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def get_feed_cache(config: Dict[str, Any]) -> FeedCache:
+    directory = resolve_cache_dir(config, "rss")
+    with _CACHES_LOCK:
+        cache = _CACHES.get(directory)
+        if cache is None:
+            cache = FeedCache(directory)
+            _CACHES[directory] = cache
+        return cache
+
+
+def record_hit() -> None:
+    _bump("hits")
+
+
+def record_miss() -> None:
+    _bump("misses")
+
+
+def feed_cache_stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def article_cache_key(url: str, content: str) -> str:
+    content_hash = hashlib.sha1(content.encode("utf-8", "replace")).hexdigest()
+    return hashlib.sha1(f"{url}\0{content_hash}".encode("utf-8")).hexdigest()
+
+
+def load_article_summary(config: Dict[str, Any], key: str) -> Optional[str]:
+    summary = _ARTICLES.get(key)
+    if summary is not None:
+        return summary
+    directory = resolve_cache_dir(config, "articles")
+    if directory is None:
+        return None
+    data = read_json(directory / f"{key}.json")
+    if not isinstance(data, dict) or not isinstance(data.get("summary"), str):
+        return None
+    _ARTICLES.set(key, data["summary"])
+    return data["summary"]
+
+
+def store_article_summary(config: Dict[str, Any], key: str, summary: str) -> None:
+    _ARTICLES.set(key, summary)
+    directory = resolve_cache_dir(config, "articles")
+    if directory is not None:
+        write_json(directory / f"{key}.json", {"summary": summary})
+
+
+def article_cache_stats() -> Dict[str, int]:
+    return _ARTICLES.stats()
+
+
+def reset_feed_cache() -> None:
+    with _CACHES_LOCK:
+        _CACHES.clear()
+    _ARTICLES.clear()
+    with _STATS_LOCK:
+        for key in _STATS:
+            _STATS[key] = 0
+
+
+def _bump(key: str) -> None:
+    with _STATS_LOCK:
+        _STATS[key] += 1
@@ -1,65 +1,379 @@
 from __future__ import annotations
 
 import re
-import html
-from typing import Any, Dict, List, Optional
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 from xml.etree import ElementTree
 
 import requests
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-def fetch_rss_items(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+from rss.cache import (  # noqa: E402
+    FeedCache,
+    article_cache_key,
+    article_cache_stats,
+    conditional_headers,
+    feed_cache_stats,
+    get_feed_cache,
+    load_article_summary,
+    record_hit,
+    record_miss,
+    store_article_summary,
+)
+from rss.html_text import extract_text  # noqa: E402
+from rss.parser import parse_feed_stream  # noqa: E402
+from utils import DaemonThreadPool, http_client  # noqa: E402
+from utils.seen_index import get_seen_index  # noqa: E402
+from utils.source_health import NOT_DUE, get_source_health  # noqa: E402
+
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_FETCH_DEADLINE_SECONDS = 30.0
+DEFAULT_MAX_ITEMS_PER_FEED = 30
+DEFAULT_MAX_FEED_BYTES = 5 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_TOP_K = 20
+DEFAULT_FULL_TEXT_WORKERS = 8
+DEFAULT_FULL_TEXT_PER_HOST = 2
+DEFAULT_FULL_TEXT_DEADLINE_SECONDS = 30.0
+RECENCY_HALF_LIFE_HOURS = 12.0
+UNDATED_RECENCY_SCORE = 0.25
+PRIORITY_WEIGHT = 0.5
+ARTICLE_SUMMARY_LENGTH = 360
+
+_LAST_REPORT: Dict[str, Any] = {}
+_REPORT_LOCK = threading.Lock()
+
+
+def fetch_rss_items(
+    config: Dict[str, Any],
+    report: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    report = {} if report is None else report
     sources = config.get("rss_sources", []) or []
-    items: List[Dict[str, Any]] = []
+    feeds = _collect_feeds(sources, config, report)
+    get_source_health(config, "rss").save()
+    if config.get("rss_only_new", False):
+        feeds = _filter_new_items(sources, feeds, config)
+    full_text = bool(config.get("rss_fetch_full_text", False))
+    items = _rank_items(feeds, _top_k(config, full_text))
+    if full_text:
+        report["full_text_timed_out"] = _attach_full_text(items, config)
+        _record_report(report)
+    return items
+
+
+def fetch_rss_items_batch(
+    configs: List[Dict[str, Any]],
+    config: Dict[str, Any],
+) -> List[List[Dict[str, Any]]]:
+    sources: List[str] = []
+    for user_config in configs:
+        for source in user_config.get("rss_sources", []) or []:
+            if source not in sources:
+                sources.append(source)
+    report: Dict[str, Any] = {}
+    feeds = dict(zip(sources, _collect_feeds(sources, config, report)))
+    get_source_health(config, "rss").save()
+    default = bool(config.get("rss_fetch_full_text", False))
+    wants_full_text = [bool(user_config.get("rss_fetch_full_text", default)) for user_config in configs]
+    selections = []
+    for user_config, wanted in zip(configs, wants_full_text):
+        user_feeds = [feeds[source] for source in user_config.get("rss_sources", []) or []]
+        selections.append(_rank_items(user_feeds, _top_k(user_config, wanted)))
+    full_text = {
+        id(item): dict(item)
+        for items, wanted in zip(selections, wants_full_text)
+        if wanted
+        for item in items
+    }
+    if full_text:
+        report["full_text_timed_out"] = _attach_full_text(list(full_text.values()), config)
+        _record_report(report)
+    return [
+        [dict(full_text[id(item)] if wanted else item) for item in items]
+        for items, wanted in zip(selections, wants_full_text)
+    ]
+
+
+def _top_k(config: Dict[str, Any], full_text: bool) -> Optional[int]:
+    return int(config.get("rss_top_k", DEFAULT_TOP_K if full_text else 0) or 0) or None
+
+
+def _collect_feeds(
+    sources: List[str],
+    config: Dict[str, Any],
+    report: Dict[str, Any],
+) -> List[List[Dict[str, Any]]]:
+    max_workers = int(config.get("rss_max_workers", DEFAULT_MAX_WORKERS) or 1)
+    timed_out: List[str] = []
+    if max_workers <= 1 or len(sources) <= 1:
+        feeds = _fetch_serial(sources, config)
+    else:
+        deadline = float(config.get("rss_fetch_deadline_seconds", DEFAULT_FETCH_DEADLINE_SECONDS))
+        feeds = _fetch_concurrent(sources, config, max_workers, deadline, timed_out)
+    report.update({"feeds": len(sources), "timed_out": timed_out})
+    _record_report(report)
+    return feeds
+
+
+def _record_report(report: Dict[str, Any]) -> None:
+    with _REPORT_LOCK:
+        _LAST_REPORT.clear()
+        _LAST_REPORT.update(report)
+
+
+def last_fetch_report() -> Dict[str, Any]:
+    with _REPORT_LOCK:
+        return dict(_LAST_REPORT)
+
+
+def _fetch_serial(sources: List[str], config: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    feeds: List[List[Dict[str, Any]]] = []
     for source in sources:
         try:
-            items.extend(_fetch_feed(source, config))
+            feeds.append(_fetch_feed(source, config))
         except requests.RequestException:
+            feeds.append([])
+    return feeds
+
+
+def _fetch_concurrent(
+    sources: List[str],
+    config: Dict[str, Any],
+    max_workers: int,
+    deadline: float,
+    timed_out: Optional[List[str]] = None,
+) -> List[List[Dict[str, Any]]]:
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    executor = DaemonThreadPool(
+        max_workers=min(max_workers, len(sources)),
+        thread_name_prefix="rss-fetch",
+    )
+    try:
+        pending: Dict[Future, int] = {
+            executor.submit(_fetch_feed, source, config): index
+            for index, source in enumerate(sources)
+        }
+        expires_at = time.monotonic() + deadline
+        while pending:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except requests.RequestException:
+                    continue
+        if timed_out is not None:
+            timed_out.extend(sources[index] for index in sorted(pending.values()))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [results.get(index, []) for index in range(len(sources))]
+
+
+def _filter_new_items(
+    sources: List[str],
+    feeds: List[List[Dict[str, Any]]],
+    config: Dict[str, Any],
+) -> List[List[Dict[str, Any]]]:
+    index = get_seen_index(config)
+    lookback = float(config.get("rss_lookback_hours", 0) or 0) * 3600
+    now = time.time()
+    fresh: List[List[Dict[str, Any]]] = []
+    for source, entries in zip(sources, feeds):
+        if not entries:
+            fresh.append([])
             continue
-    return items
+        fresh_entries = index.filter_new(source, entries, lookback, now)
+        since = index.last_success(source)
+        if since is not None:
+            cutoff = since - lookback
+            fresh_entries = [item for item in fresh_entries if not _published_before(item, cutoff)]
+        fresh.append(fresh_entries)
+    return fresh
+
+
+def mark_rss_items_seen(items: List[Dict[str, Any]], config: Dict[str, Any]) -> None:
+    if not config.get("rss_only_new", False):
+        return
+    index = get_seen_index(config)
+    now = time.time()
+    by_feed: Dict[str, List[Dict[str, Any]]] = {
+        source: [] for source in config.get("rss_sources", []) or []
+    }
+    for item in items:
+        feed_url = item.get("feed_url")
+        if feed_url:
+            by_feed.setdefault(feed_url, []).append(item)
+    for source, entries in by_feed.items():
+        index.mark_seen(source, entries, now)
+
+
+def _published_before(item: Dict[str, Any], cutoff: float) -> bool:
+    published = _parse_timestamp(item.get("published_at", ""))
+    return published is not None and published.timestamp() < cutoff
+
+
+def _rank_items(
+    feeds: List[List[Dict[str, Any]]],
+    top_k: Optional[int],
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    now = now or datetime.now(timezone.utc)
+    scored = []
+    for feed_index, entries in enumerate(feeds):
+        priority = (len(feeds) - feed_index) / len(feeds)
+        for position, item in enumerate(entries):
+            score = _recency_score(item.get("published_at", ""), now) + PRIORITY_WEIGHT * priority
+            scored.append((-score, feed_index, position, item))
+    scored.sort(key=lambda entry: entry[:3])
+    ranked = [entry[3] for entry in scored]
+    if top_k:
+        ranked = ranked[:top_k]
+    return ranked
+
+
+def _recency_score(published_at: str, now: datetime) -> float:
+    published = _parse_timestamp(published_at)
+    if published is None:
+        return UNDATED_RECENCY_SCORE
+    age_hours = max((now - published).total_seconds() / 3600, 0.0)
+    return 0.5 ** (age_hours / RECENCY_HALF_LIFE_HOURS)
+
+
+def _attach_full_text(items: List[Dict[str, Any]], config: Dict[str, Any]) -> int:
+    targets = [item for item in items if item.get("link")]
+    if not targets:
+        return 0
+    per_host = int(config.get("rss_full_text_per_host", DEFAULT_FULL_TEXT_PER_HOST) or 1)
+    max_workers = int(config.get("rss_full_text_workers", DEFAULT_FULL_TEXT_WORKERS) or 1)
+    deadline = float(config.get("rss_full_text_deadline_seconds", DEFAULT_FULL_TEXT_DEADLINE_SECONDS))
+    host_limits: Dict[str, threading.Semaphore] = {}
+    for item in targets:
+        host = urlparse(item["link"]).hostname or ""
+        host_limits.setdefault(host, threading.Semaphore(per_host))
+
+    def fetch(item: Dict[str, Any]) -> Optional[str]:
+        host = urlparse(item["link"]).hostname or ""
+        with host_limits[host]:
+            return _fetch_article_summary(item["link"], config)
+
+    executor = DaemonThreadPool(
+        max_workers=min(max_workers, len(targets)),
+        thread_name_prefix="rss-article",
+    )
+    try:
+        futures = [executor.submit(fetch, item) for item in targets]
+        wait(futures, timeout=max(deadline, 0))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    timed_out = 0
+    for item, future in zip(targets, futures):
+        if not future.done() or future.cancelled():
+            timed_out += 1
+            continue
+        if future.exception() is not None:
+            continue
+        summary = future.result()
+        if summary:
+            item["summary"] = summary
+    return timed_out
 
 
 def _fetch_feed(url: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
-    response = requests.get(url, timeout=10)
-    response.raise_for_status()
-    content = response.text
-    root = ElementTree.fromstring(content)
-    channel = root.find("channel")
-    source_name = _guess_source_name(url, channel)
+    health = get_source_health(config, "rss")
+    cache = get_feed_cache(config)
+    cached = cache.load(url)
+    allowed, reason = health.should_fetch(url)
+    if not allowed:
+        if reason == NOT_DUE and cached is not None:
+            return _copy_items(cached.get("items", []), url)
+        return []
+    started = time.monotonic()
+    try:
+        entries, changed = _download_feed(url, config, cache, cached)
+    except requests.RequestException:
+        health.record_failure(url, time.monotonic() - started)
+        raise
+    except (ElementTree.ParseError, ValueError):
+        health.record_failure(url, time.monotonic() - started)
+        return []
+    health.record_success(url, time.monotonic() - started, changed)
+    return _copy_items(entries, url)
+
+
+def _copy_items(items: List[Dict[str, Any]], url: str) -> List[Dict[str, Any]]:
+    return [{**item, "feed_url": url} for item in items]
+
+
+def _download_feed(
+    url: str,
+    config: Dict[str, Any],
+    cache: FeedCache,
+    cached: Optional[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], bool]:
+    response = http_client.get(
+        url,
+        headers=conditional_headers(cached),
+        timeout=10,
+        stream=True,
+    )
+    try:
+        if response.status_code == 304:
+            if cached is None:
+                return [], False
+            record_hit()
+            return cached.get("items", []), False
+        response.raise_for_status()
+        record_miss()
+        feed_title, raw_entries = parse_feed_stream(
+            response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+            max_items=int(config.get("rss_max_items_per_feed", DEFAULT_MAX_ITEMS_PER_FEED) or 0),
+            max_bytes=int(config.get("rss_max_feed_bytes", DEFAULT_MAX_FEED_BYTES) or 0),
+        )
+    finally:
+        response.close()
+    source_name = _guess_source_name(url, feed_title)
     entries: List[Dict[str, Any]] = []
-    for item in root.findall(".//item"):
-        title = _text(item.find("title"))
-        summary = _text(item.find("description"))
-        link = _text(item.find("link"))
-        if config.get("rss_fetch_full_text", False) and link:
-            full_text = _fetch_article_summary(link)
-            if full_text:
-                summary = full_text
-        published_at = _parse_pub_date(_text(item.find("pubDate")))
+    for raw in raw_entries:
         entries.append(
             {
-                "title": title,
-                "summary": summary,
-                "published_at": published_at,
+                "title": raw["title"],
+                "summary": raw["summary"],
+                "published_at": _parse_pub_date(raw["published"]),
                 "source_name": source_name,
-                "link": link,
+                "link": raw["link"],
             }
         )
-    return entries
+    changed = cached is None or _entry_links(cached.get("items", [])) != _entry_links(entries)
+    cache.store(url, response.headers, entries)
+    return entries, changed
 
 
-def _text(node: ElementTree.Element | None) -> str:
-    if node is None or node.text is None:
-        return ""
-    return node.text.strip()
+def _entry_links(entries: List[Dict[str, Any]]) -> List[str]:
+    return [entry.get("link") or entry.get("title", "") for entry in entries]
+
 
+def feed_health_report(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    sources = set(config.get("rss_sources", []) or [])
+    report = get_source_health(config, "rss").report()
+    return [row for row in report if not sources or row["source"] in sources]
 
-def _guess_source_name(url: str, channel: ElementTree.Element | None) -> str:
-    if channel is not None:
-        title = _text(channel.find("title"))
-        if title:
-            return title
+
+def _guess_source_name(url: str, feed_title: str) -> str:
+    if feed_title:
+        return feed_title
     hostname = urlparse(url).hostname or "rss"
     return hostname.replace("www.", "")
 
@@ -68,29 +382,41 @@ def _parse_pub_date(value: str) -> str:
     if not value:
         return ""
     normalized = re.sub(r"\s+", " ", value).strip()
-    return normalized
+    published = _parse_timestamp(normalized)
+    if published is None:
+        return normalized
+    return published.isoformat()
 
 
-def _fetch_article_summary(url: str) -> Optional[str]:
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    if not value:
+        return None
     try:
-        response = requests.get(url, timeout=10)
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _fetch_article_summary(url: str, config: Dict[str, Any]) -> Optional[str]:
+    try:
+        response = http_client.get(url, timeout=10)
         response.raise_for_status()
     except requests.RequestException:
         return None
-    text = _extract_text_from_html(response.text)
-    if not text:
-        return None
-    return _truncate_text(text, 360)
-
-
-def _extract_text_from_html(content: str) -> str:
-    content = re.sub(r"(?is)<script.*?>.*?</script>", " ", content)
-    content = re.sub(r"(?is)<style.*?>.*?</style>", " ", content)
-    content = re.sub(r"(?is)<noscript.*?>.*?</noscript>", " ", content)
-    content = re.sub(r"(?is)<[^>]+>", " ", content)
-    content = html.unescape(content)
-    content = re.sub(r"\s+", " ", content).strip()
-    return content
+    content = response.text
+    key = article_cache_key(url, content)
+    summary = load_article_summary(config, key)
+    if summary is None:
+        text = extract_text(content, ARTICLE_SUMMARY_LENGTH)
+        summary = _truncate_text(text, ARTICLE_SUMMARY_LENGTH) if text else ""
+        store_article_summary(config, key, summary)
+    return summary or None
 
 
 def _truncate_text(text: str, max_len: int) -> str:
@@ -112,10 +438,17 @@ def _cli() -> None:
 
     parser = argparse.ArgumentParser(description="Fetch RSS items")
     parser.add_argument("config", help="Path to config.json")
+    parser.add_argument("--health", action="store_true", help="Print feed health report")
     args = parser.parse_args()
     config = _load_config(args.config)
     items = fetch_rss_items(config)
+    if args.health:
+        print(json.dumps(feed_health_report(config), ensure_ascii=False, indent=2))
+        return
     print(json.dumps(items, ensure_ascii=False, indent=2))
+    mark_rss_items_seen(items, config)
+    stats = {"feed_cache": feed_cache_stats(), "article_cache": article_cache_stats()}
+    print(json.dumps(stats), file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from html.parser import HTMLParser
+from typing import List, Optional
+
+SKIP_TAGS = {"script", "style", "noscript"}
+FEED_CHUNK_SIZE = 8 * 1024
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self, limit: Optional[int]) -> None:
+        super().__init__(convert_charrefs=True)
+        self._limit = limit
+        self._skip_depth = 0
+        self._pending: List[str] = []
+        self._words: List[str] = []
+        self._length = 0
+        self.done = False
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        self._flush()
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_startendtag(self, tag: str, attrs) -> None:
+        self._flush()
+
+    def handle_endtag(self, tag: str) -> None:
+        self._flush()
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth or self.done:
+            return
+        self._pending.append(data)
+        if data[-1:].isspace():
+            self._flush()
+
+    def text(self) -> str:
+        self._flush()
+        return " ".join(self._words)
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        data = "".join(self._pending)
+        self._pending.clear()
+        for word in data.split():
+            if self.done:
+                return
+            self._words.append(word)
+            self._length += len(word) + 1
+            if self._limit and self._length > self._limit:
+                self.done = True
+
+
+def extract_text(content: str, limit: Optional[int] = None) -> str:
+    collector = _TextCollector(limit)
+    for start in range(0, len(content), FEED_CHUNK_SIZE):
+        collector.feed(content[start : start + FEED_CHUNK_SIZE])
+        if collector.done:
+            return collector.text()
+    collector.close()
+    return collector.text()
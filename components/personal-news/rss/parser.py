@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.etree import ElementTree
+
+ENTRY_TAGS = {"item", "entry"}
+CONTAINER_TAGS = {"channel", "feed"}
+SUMMARY_TAGS = ("description", "summary", "content", "encoded")
+DATE_TAGS = ("pubDate", "published", "updated", "date")
+
+
+def parse_feed_stream(
+    chunks: Iterable[bytes],
+    max_items: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Tuple[str, List[Dict[str, str]]]:
+    parser = ElementTree.XMLPullParser(events=("start", "end"))
+    stack: List[ElementTree.Element] = []
+    feed_title = ""
+    entries: List[Dict[str, str]] = []
+    received = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        received += len(chunk)
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                stack.append(element)
+                continue
+            stack.pop()
+            name = _local_name(element.tag)
+            parent = stack[-1] if stack else None
+            if name in ENTRY_TAGS:
+                entries.append(_entry_fields(element))
+                if parent is not None:
+                    parent.remove(element)
+                if max_items and len(entries) >= max_items:
+                    return feed_title, entries
+            elif (
+                name == "title"
+                and not feed_title
+                and parent is not None
+                and _local_name(parent.tag) in CONTAINER_TAGS
+            ):
+                feed_title = _text(element)
+        if max_bytes and received >= max_bytes:
+            break
+    return feed_title, entries
+
+
+def _entry_fields(element: ElementTree.Element) -> Dict[str, str]:
+    children: Dict[str, ElementTree.Element] = {}
+    link = ""
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "link" and not link:
+            link = _text(child) or _atom_link(child)
+            continue
+        children.setdefault(name, child)
+    return {
+        "title": _text(children.get("title")),
+        "summary": _first_text(children, SUMMARY_TAGS),
+        "link": link,
+        "published": _first_text(children, DATE_TAGS),
+        "guid": _first_text(children, ("guid", "id")),
+    }
+
+
+def _atom_link(node: ElementTree.Element) -> str:
+    if node.get("rel", "alternate") != "alternate":
+        return ""
+    return (node.get("href") or "").strip()
+
+
+def _first_text(children: Dict[str, ElementTree.Element], names: Iterable[str]) -> str:
+    for name in names:
+        value = _text(children.get(name))
+        if value:
+            return value
+    return ""
+
+
+def _text(node: ElementTree.Element | None) -> str:
+    if node is None or node.text is None:
+        return ""
+    return node.text.strip()
+
+
+def _local_name(tag: str) -> str:
+    if tag.startswith("{"):
+        return tag.rsplit("}", 1)[1]
+    return tag
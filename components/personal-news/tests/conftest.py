@@ -4,3 +4,27 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 sys.path.insert(0, str(ROOT.parent))
+
+import pytest  # noqa: E402
+
+from utils import http_client  # noqa: E402
+
+
+class FakeTransport:
+    def __init__(self):
+        self.get = None
+        self.post = None
+
+    def request(self, method, url, **kwargs):
+        handler = getattr(self, method.lower())
+        if handler is None:
+            raise AssertionError(f"unexpected {method} {url}")
+        return handler(url, **kwargs)
+
+
+@pytest.fixture
+def http_transport():
+    transport = FakeTransport()
+    http_client.set_transport(transport)
+    yield transport
+    http_client.set_transport(None)
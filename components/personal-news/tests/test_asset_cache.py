@@ -0,0 +1,35 @@
+import os
+
+from utils.asset_cache import AssetCache
+
+
+def test_asset_cache_invalidates_on_mtime(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<p>one</p>", encoding="utf-8")
+    cache = AssetCache()
+    first = cache.load(path)
+    assert cache.load(path) is first
+    path.write_text("<p>two</p>", encoding="utf-8")
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    second = cache.load(path)
+    assert second.text() == "<p>two</p>"
+    assert second.etag != first.etag
+    assert second.not_modified(second.etag, None)
+    assert not second.not_modified(first.etag, None)
+    assert cache.stats() == {"entries": 1, "hits": 1, "loads": 2}
+
+
+def test_asset_etag_differs_per_content_coding(tmp_path):
+    path = tmp_path / "app.js"
+    path.write_text("console.log('hello');\n" * 64, encoding="utf-8")
+    asset = AssetCache().load(path)
+    encoding, body = asset.encoded("gzip, deflate")
+    assert encoding == "gzip"
+    assert body == asset.variants["gzip"]
+    gzip_tag = asset.etag_for(encoding)
+    assert gzip_tag == asset.etag[:-1] + '-gzip"'
+    assert asset.etag_for(None) == asset.etag
+    assert asset.not_modified(gzip_tag, None)
+    assert asset.not_modified(f"W/{gzip_tag}", None)
+    assert asset.not_modified(f'"other", {asset.etag}', None)
+    assert not asset.not_modified('"other-gzip"', None)
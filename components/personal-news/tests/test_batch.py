@@ -0,0 +1,137 @@
+from collections import Counter
+
+import pytest
+
+import batch
+import main
+from editor.response_cache import reset_response_cache
+from rss.cache import reset_feed_cache
+from utils.source_health import reset_source_health
+from x.timeline import reset_timeline_state
+from x.user_cache import reset_user_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    reset_feed_cache()
+    reset_source_health()
+    reset_user_cache()
+    reset_timeline_state()
+    reset_response_cache()
+    main.weather_module.reset_weather_cache()
+    yield
+
+
+class FakeResponse:
+    def __init__(self, data, text=""):
+        self._data = data
+        self.text = text
+        self.status_code = 200
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._data
+
+    def iter_content(self, chunk_size=1):
+        yield self.text.encode("utf-8")
+
+    def close(self):
+        pass
+
+
+def _feed(title, story):
+    return (
+        f"<rss><channel><title>{title}</title><item><title>{story}</title>"
+        f"<link>https://example.com/{story}</link></item></channel></rss>"
+    )
+
+
+def test_generate_batch_fetches_each_unique_source_once(monkeypatch, http_transport, tmp_path):
+    gets = Counter()
+    posts = []
+
+    def fake_get(url, headers=None, params=None, timeout=10, stream=False):
+        gets[url if "wttr" not in url else f"{url}?{params['lang']}"] += 1
+        if url == "https://a.example/rss":
+            return FakeResponse(None, _feed("Alpha", "StoryA"))
+        if url == "https://b.example/rss":
+            return FakeResponse(None, _feed("Beta", "StoryB"))
+        if url.endswith("/users/by"):
+            names = params["usernames"].split(",")
+            users = [{"id": str(100 + len(name)), "username": name} for name in names]
+            return FakeResponse({"data": users})
+        if "/tweets" in url:
+            return FakeResponse({"data": [{"id": url, "text": f"post from {url}"}]})
+        return FakeResponse({"current_condition": [{"weatherDesc": [{"value": "晴"}], "temp_C": "20"}]})
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        posts.append(json)
+        text = json["messages"][1]["content"]
+        return FakeResponse({"choices": [{"message": {"content": f"稿件 {len(text)}"}}]})
+
+    monkeypatch.setenv("X_BEARER_TOKEN", "token")
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    http_transport.get = fake_get
+    http_transport.post = fake_post
+    users = [
+        (
+            f"user{index}",
+            {
+                "city": "Beijing",
+                "rss_sources": ["https://a.example/rss", "https://b.example/rss"][: 1 + index % 2],
+                "x_priority_accounts": ["alice", "bob"][: 1 + index % 2],
+                "llm_cache_bypass": True,
+            },
+        )
+        for index in range(6)
+    ]
+    results = batch.generate_batch(users, {"rss_max_workers": 1}, tmp_path)
+
+    assert [result["user"] for result in results] == [f"user{index}" for index in range(6)]
+    assert all(result["script"] and result["error"] is None for result in results)
+    assert len(posts) == 6
+    assert gets["https://a.example/rss"] == 1
+    assert gets["https://b.example/rss"] == 1
+    assert gets["https://api.x.com/2/users/by"] == 1
+    assert sum(count for url, count in gets.items() if "/tweets" in url) == 2
+    assert sum(count for url, count in gets.items() if "wttr" in url) == 1
+    first, second = (batch.build_batch_inputs([users[0][1], users[1][1]], {}))
+    assert [len(block["items"]) for block in first] == [1, 1, 1]
+    assert [len(block["items"]) for block in second] == [2, 2, 1]
+
+
+def test_generate_batch_honours_per_user_full_text_and_isolates_failures(
+    monkeypatch, http_transport, tmp_path, capsys
+):
+    def fake_get(url, headers=None, params=None, timeout=10, stream=False):
+        if url == "https://a.example/rss":
+            return FakeResponse(None, _feed("Alpha", "StoryA"))
+        return FakeResponse(None, "<html><body><p>Full story.</p></body></html>")
+
+    def fake_generate(payload):
+        if payload["config"].get("fail"):
+            raise ValueError("bad payload")
+        return "稿件"
+
+    http_transport.get = fake_get
+    monkeypatch.setattr(main, "generate_broadcast_script", fake_generate)
+    users = [
+        ("full", {"rss_sources": ["https://a.example/rss"], "rss_fetch_full_text": True}),
+        ("plain", {"rss_sources": ["https://a.example/rss"], "fail": True}),
+        ("capped", {"rss_sources": ["https://a.example/rss"], "rss_max_items_per_feed": 3}),
+    ]
+    configs = [config for _, config in users]
+    full, plain, capped = batch.build_batch_inputs(configs, {})
+    assert full[0]["items"][0]["summary"] == "Full story."
+    assert plain[0]["items"][0]["summary"] == ""
+
+    results = batch.generate_batch(users, {}, tmp_path)
+    assert [(result["script"], result["error"]) for result in results] == [
+        ("稿件", None),
+        (None, "bad payload"),
+        ("稿件", None),
+    ]
+    assert '{"batch_ignored_overrides": {"capped": ["rss_max_items_per_feed"]}}' in capsys.readouterr().err
@@ -0,0 +1,497 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from editor.client import generate_broadcast_script
+from editor.response_cache import reset_response_cache, response_cache_stats
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+        self.text = str(data)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError("status error")
+
+    def json(self):
+        return self._data
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, http_transport):
+    calls = []
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        calls.append(json)
+        content = f"播报稿 {len(calls)}"
+        return FakeResponse({"choices": [{"message": {"content": content}}]})
+
+    reset_response_cache()
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    http_transport.post = fake_post
+    return calls
+
+
+def _payload(**config):
+    return {
+        "config": config,
+        "inputs": [{"source": "weather", "items": [{"summary": "晴，当前气温20度。"}]}],
+    }
+
+
+def test_generate_broadcast_script_serves_repeats_from_cache(fake_llm, tmp_path):
+    first = generate_broadcast_script(_payload(cache_dir=str(tmp_path)))
+    second = generate_broadcast_script(_payload(cache_dir=str(tmp_path)))
+    assert first == second == "播报稿 1"
+    assert len(fake_llm) == 1
+    assert response_cache_stats()["hits"] == 1
+    reset_response_cache()
+    assert generate_broadcast_script(_payload(cache_dir=str(tmp_path))) == "播报稿 1"
+    assert response_cache_stats()["disk_hits"] == 1
+
+
+def test_generate_broadcast_script_cache_bypass(fake_llm):
+    generate_broadcast_script(_payload())
+    generate_broadcast_script(_payload(), use_cache=False)
+    generate_broadcast_script(_payload(llm_cache_bypass=True))
+    generate_broadcast_script(_payload(llm_temperature=0.9))
+    assert len(fake_llm) == 4
+    assert response_cache_stats()["bypassed"] == 3
+
+
+class FakeStreamResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self._lines)
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_broadcast_script_yields_deltas_and_fills_cache(monkeypatch, http_transport):
+    from editor.client import stream_broadcast_script
+    from personal_news.sse import sse_stream
+
+    requests_seen = []
+    lines = [
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        "",
+        'data: {"choices": [{"delta": {"content": "今日要闻"}}]}',
+        'data: {"choices": [{"delta": {"content": "，天气晴。"}}]}',
+        "data: [DONE]",
+    ]
+
+    def fake_post(url, headers=None, json=None, timeout=30, stream=False):
+        requests_seen.append((json.get("stream"), stream))
+        return FakeStreamResponse(lines)
+
+    reset_response_cache()
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    http_transport.post = fake_post
+    chunks = list(stream_broadcast_script(_payload()))
+    assert chunks == ["今日要闻", "，天气晴。"]
+    assert requests_seen == [(True, True)]
+    assert generate_broadcast_script(_payload()) == "今日要闻，天气晴。"
+    events = b"".join(sse_stream(iter(chunks))).decode("utf-8")
+    assert events.startswith('data: {"text": "今日要闻"}\n\n')
+    assert events.endswith("event: done\ndata: {}\n\n")
+
+
+def test_pack_inputs_fills_budget_by_score():
+    from datetime import datetime, timedelta, timezone
+
+    from editor.packer import estimate_tokens, pack_inputs, prompt_token_budget
+
+    now = datetime.now(timezone.utc)
+    rss_items = [
+        {
+            "title": f"Story {index}",
+            "summary": "新闻正文" * 200,
+            "published_at": (now - timedelta(hours=index)).isoformat(),
+            "source_name": "Daily",
+            "link": f"https://example.com/{index}",
+        }
+        for index in range(8)
+    ]
+    inputs = [
+        {"source": "rss", "items": list(reversed(rss_items))},
+        {"source": "x", "items": [{"author": "a", "text": "hi", "engagement": {"likes": 900}}]},
+        {"source": "weather", "items": [{"summary": "晴"}, {"summary": "雨"}]},
+    ]
+    packed = pack_inputs(inputs, {}, budget=700, now=now)
+    rss, x, weather = (block["items"] for block in packed)
+    assert [item["title"] for item in rss][:2] == ["Story 0", "Story 1"]
+    assert len(rss) < 5
+    assert all("link" not in item for item in rss)
+    assert x[0]["text"] == "hi"
+    assert weather == [{"summary": "晴"}]
+    assert sum(estimate_tokens(str(item)) for block in packed for item in block["items"]) < 800
+    assert prompt_token_budget({"max_duration_seconds": 60}, "gpt-4o-mini") == 720
+    assert prompt_token_budget({"llm_prompt_token_budget": 999}, "gpt-4o-mini") == 999
+
+
+def test_collapse_duplicates_merges_cross_source_story():
+    from editor.dedupe import collapse_duplicates
+
+    inputs = [
+        {
+            "source": "rss",
+            "items": [
+                {"title": "SpaceX launches new Starship rocket from Texas", "source_name": "BBC"},
+                {
+                    "title": "Starship lifts off on fifth test flight",
+                    "summary": "SpaceX's Starship rocket launched from Starbase in Boca Chica, Texas, "
+                    "on Thursday morning.",
+                    "source_name": "Reuters",
+                },
+                {"title": "Apple launches new iPhone", "source_name": "The Verge"},
+                {"title": "Samsung launches new phone", "source_name": "Engadget"},
+            ],
+        },
+        {
+            "source": "x",
+            "items": [
+                {
+                    "author": "SpaceX",
+                    "text": "Starship has lifted off from Starbase, Texas! Watch the fifth flight test "
+                    "of the new Starship rocket live → https://x.com/i/broadcasts/1",
+                }
+            ],
+        },
+        {"source": "weather", "items": [{"summary": "晴"}]},
+    ]
+    collapsed = collapse_duplicates(inputs)
+    rss, x, weather = (block["items"] for block in collapsed)
+    assert [item["title"] for item in rss] == ["Apple launches new iPhone", "Samsung launches new phone"]
+    assert x[0]["also_reported_by"] == ["BBC", "Reuters"]
+    assert weather == [{"summary": "晴"}]
+    assert "also_reported_by" not in inputs[1]["items"][0]
+
+
+def test_generate_broadcast_script_reports_only_items_sent_to_the_model(fake_llm):
+    titles = ["Council approves city budget", "Rain expected this weekend", "Museum opens new wing", "Bank cuts rates"]
+    stories = [{"title": title, "link": f"https://example.com/{index}"} for index, title in enumerate(titles)]
+    launch = {"title": "SpaceX launches new Starship rocket from Texas", "link": "https://example.com/launch"}
+    tweet = {
+        "id": "1",
+        "author_id": "42",
+        "author": "SpaceX",
+        "text": "Starship rocket launches from Starbase, Texas! SpaceX new flight test",
+        "engagement": {"likes": 5000},
+    }
+    payload = {
+        "config": {"llm_max_items_per_source": 2},
+        "inputs": [{"source": "rss", "items": [launch, *stories]}, {"source": "x", "items": [tweet]}],
+    }
+    report = {}
+    generate_broadcast_script(payload, report=report)
+    used = {block["source"]: block["items"] for block in report["inputs"]}
+    assert launch in used["rss"]
+    assert len(used["rss"]) == 3
+    assert sum(story in used["rss"] for story in stories) == 2
+    assert used["x"][0]["id"] == "1" and used["x"][0]["author_id"] == "42"
+    assert all(item.get("link") for item in used["rss"])
+
+
+def test_shingle_set_is_stable_across_hash_seeds():
+    from editor.dedupe import shingle_set
+
+    script = "from editor.dedupe import shingle_set; print(sorted(shingle_set('SpaceX 发射新火箭')))"
+    root = Path(__file__).resolve().parents[1]
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=root,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        for seed in ("1", "2")
+    }
+    assert outputs == {str(sorted(shingle_set("SpaceX 发射新火箭")))}
+
+
+def test_score_inputs_ranks_by_profile_recency_and_engagement():
+    from datetime import datetime, timedelta, timezone
+
+    from editor.scoring import score_inputs
+
+    now = datetime.now(timezone.utc)
+    inputs = [
+        {
+            "source": "rss",
+            "items": [
+                {"title": "Local sports", "summary": "match", "published_at": now.isoformat()},
+                {"title": "New AI model", "summary": "AI lab ships", "published_at": now.isoformat()},
+                {
+                    "title": "Old AI story",
+                    "summary": "AI",
+                    "published_at": (now - timedelta(days=5)).isoformat(),
+                },
+            ],
+        },
+        {
+            "source": "x",
+            "items": [
+                {
+                    "text": "quiet post",
+                    "created_at": now.isoformat(),
+                    "engagement": {"likes": 1, "retweets": 0},
+                },
+                {
+                    "text": "viral post",
+                    "created_at": now.isoformat(),
+                    "engagement": {"likes": 5000, "retweets": 900},
+                },
+            ],
+        },
+        {"source": "weather", "items": [{"summary": "晴"}]},
+    ]
+    ranked = score_inputs(inputs, {"keywords": {"ai": 1.0}}, top_n=3, now=now)
+    rss, x, weather = (block["items"] for block in ranked)
+    assert [item["title"] for item in rss] == ["New AI model", "Old AI story"]
+    assert [item["text"] for item in x] == ["viral post"]
+    assert rss[0]["score"] > rss[1]["score"]
+    assert weather == [{"summary": "晴"}]
+
+
+def test_score_items_matches_latin_terms_on_word_boundaries():
+    from datetime import datetime, timezone
+
+    from editor.scoring import score_items
+
+    now = datetime.now(timezone.utc)
+    items = [
+        ("rss", {"title": "He said trains again", "summary": "Taiwan"}),
+        ("rss", {"title": "AI chips", "summary": "machine learning at scale"}),
+        ("x", {"text": "人工智能芯片发布"}),
+    ]
+    profile = {
+        "keywords": {"AI": 1.0, "machine learning": 1.0, "智能": 1.0},
+        "weights": {"relevance": 1.0, "recency": 0.0, "engagement": 0.0},
+    }
+    scores = score_items(items, profile, now)
+    assert scores[0] == 0
+    assert scores[1] > 0
+    assert scores[2] > 0
+
+
+
+def test_score_items_stays_fast_with_large_profiles():
+    import random
+    import time
+    from datetime import datetime, timezone
+
+    from editor.scoring import score_items
+
+    rng = random.Random(0)
+    words = [f"w{index}" for index in range(5000)] + ["ai", "chip", "safety", "人工智能"] * 20
+
+    def text(length):
+        return " ".join(rng.choices(words, k=length))
+
+    items = [("rss", {"title": text(10), "summary": text(60)}) for _ in range(4000)]
+    items += [("x", {"text": text(30)}) for _ in range(1000)]
+    keywords = {f"k{index}": 1.0 for index in range(300)}
+    keywords.update({"ai": 1.0, "ai safety": 2.0, "人工智能": 1.0})
+    now = datetime.now(timezone.utc)
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        scores = score_items(items, {"keywords": keywords}, now)
+        timings.append(time.perf_counter() - started)
+    assert len(scores) == 5000
+    assert min(timings) < 0.15
+
+class FakeStatusResponse(FakeResponse):
+    def __init__(self, data, status_code=200, headers=None):
+        super().__init__(data, status_code)
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def llm_state(monkeypatch):
+    from editor import resilience
+
+    sleeps = []
+    reset_response_cache()
+    resilience.reset_llm_call_state()
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    monkeypatch.setattr(resilience, "_sleep", sleeps.append)
+    yield sleeps
+    resilience.reset_llm_call_state()
+
+
+def test_generate_broadcast_script_retries_honoring_retry_after(llm_state, http_transport):
+    from editor.resilience import llm_call_stats
+
+    replies = [
+        FakeStatusResponse("busy", 429, {"Retry-After": "3"}),
+        FakeStatusResponse("down", 503),
+        FakeStatusResponse({"choices": [{"message": {"content": "稿件"}}]}),
+    ]
+    http_transport.post = lambda url, **kwargs: replies.pop(0)
+    assert generate_broadcast_script(_payload(llm_cache_bypass=True, llm_backoff_base_seconds=0.5)) == "稿件"
+    assert llm_state[0] == 3.0
+    assert 0 <= llm_state[1] <= 1.0
+    assert llm_call_stats()["retries"] == 2
+
+
+def test_retry_after_beyond_budget_fails_over_without_waiting(llm_state):
+    from editor.resilience import call_with_failover
+
+    calls = []
+
+    def send(base_url, model):
+        calls.append(base_url)
+        if base_url == "https://primary":
+            return FakeStatusResponse("busy", 429, {"Retry-After": "120"})
+        return FakeStatusResponse("busy", 429, {"Retry-After": "20"})
+
+    targets = [("https://primary", "m"), ("https://backup", "m")]
+    response = call_with_failover(targets, send, {"llm_retry_budget_seconds": 30})
+    assert response.status_code == 429
+    assert not response.closed
+    assert calls == ["https://primary", "https://backup", "https://backup"]
+    assert llm_state == [20.0]
+
+
+def test_generate_broadcast_script_fails_over_to_next_endpoint(llm_state, monkeypatch, http_transport):
+    calls = []
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        calls.append((url, json["model"]))
+        if url.startswith("https://primary"):
+            return FakeStatusResponse("error", 500)
+        return FakeStatusResponse({"choices": [{"message": {"content": "备用"}}]})
+
+    monkeypatch.setenv("LLM_API_BASE", "https://primary,https://backup")
+    monkeypatch.setenv("LLM_MODEL", "big-model,small-model")
+    http_transport.post = fake_post
+    assert generate_broadcast_script(_payload(llm_max_retries=1)) == "备用"
+    assert calls == [
+        ("https://primary/v1/chat/completions", "big-model"),
+        ("https://primary/v1/chat/completions", "big-model"),
+        ("https://backup/v1/chat/completions", "small-model"),
+    ]
+
+
+def test_generate_broadcast_script_hedges_slow_request(llm_state, monkeypatch, http_transport):
+    import threading
+
+    from editor.resilience import llm_call_stats, record_latency
+
+    release = threading.Event()
+    calls = []
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        calls.append(url)
+        if len(calls) == 1:
+            release.wait(2)
+            return FakeStatusResponse({"choices": [{"message": {"content": "慢"}}]})
+        return FakeStatusResponse({"choices": [{"message": {"content": "快"}}]})
+
+    monkeypatch.delenv("LLM_API_BASE", raising=False)
+    monkeypatch.delenv("LLM_MODEL", raising=False)
+    for _ in range(5):
+        record_latency(("https://api.openai.com", "gpt-4o-mini"), 0.01)
+    http_transport.post = fake_post
+    try:
+        script = generate_broadcast_script(
+            _payload(llm_cache_bypass=True, llm_hedge_enabled=True, llm_hedge_min_samples=5)
+        )
+    finally:
+        release.set()
+    assert script == "快"
+    assert len(calls) == 2
+    assert llm_call_stats()["hedge_wins"] == 1
+
+
+def test_generate_sectioned_script_runs_sections_in_parallel_then_assembles(monkeypatch, http_transport):
+    import json as jsonlib
+    import threading
+
+    from editor.sections import generate_sectioned_script
+
+    barrier = threading.Barrier(2, timeout=2)
+    requests_seen = []
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        payload = jsonlib.loads(json["messages"][1]["content"])
+        requests_seen.append(payload)
+        if "section" in payload:
+            barrier.wait()
+            return FakeResponse({"choices": [{"message": {"content": f"## {payload['section']}"}}]})
+        scripts = " | ".join(section["script"] for section in payload["sections"])
+        return FakeResponse({"choices": [{"message": {"content": f"片头 {scripts} 结束语"}}]})
+
+    reset_response_cache()
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    http_transport.post = fake_post
+    payload = {
+        "config": {},
+        "inputs": [
+            {"source": "weather", "items": [{"summary": "晴"}]},
+            {"source": "rss", "items": [{"title": "Story", "summary": "Body"}]},
+            {"source": "x", "items": []},
+        ],
+    }
+    script = generate_sectioned_script(payload)
+    assert script == "片头 ## 今日要闻 | ## 天气情况 结束语"
+    assert len(requests_seen) == 3
+    assert [block["source"] for block in requests_seen[0]["inputs"]] in (["weather"], ["rss"])
+
+
+def test_generate_sectioned_script_dedupes_across_sections_and_splits_budget(monkeypatch, http_transport):
+    import json as jsonlib
+
+    from editor.packer import estimate_tokens
+    from editor.sections import generate_sectioned_script
+
+    sections_seen = {}
+
+    def fake_post(url, headers=None, json=None, timeout=30):
+        payload = jsonlib.loads(json["messages"][1]["content"])
+        if "section" in payload:
+            sections_seen[payload["section"]] = payload["inputs"][0]["items"]
+            return FakeResponse({"choices": [{"message": {"content": payload["section"]}}]})
+        return FakeResponse({"choices": [{"message": {"content": "稿件"}}]})
+
+    reset_response_cache()
+    monkeypatch.setenv("LLM_API_KEY", "key")
+    http_transport.post = fake_post
+    launch = {"title": "SpaceX launches new Starship rocket from Texas", "source_name": "BBC"}
+    stories = [
+        {"title": f"Story {index}", "summary": " ".join(f"w{index}x{word}" for word in range(150))}
+        for index in range(30)
+    ]
+    tweet = {"author": "SpaceX", "text": "Starship rocket launches from Starbase, Texas! SpaceX new flight test"}
+    payload = {
+        "config": {"llm_prompt_token_budget": 3000, "llm_max_items_per_source": 30},
+        "inputs": [{"source": "rss", "items": [launch, *stories]}, {"source": "x", "items": [tweet]}],
+    }
+    assert generate_sectioned_script(payload) == "稿件"
+    rss, x = sections_seen["今日要闻"], sections_seen["与我相关的动态"]
+    assert all(item.get("title") != launch["title"] for item in rss)
+    assert x[0]["also_reported_by"] == ["BBC"]
+    assert 0 < sum(estimate_tokens(jsonlib.dumps(item, ensure_ascii=False)) for item in rss) < 1500
@@ -0,0 +1,77 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import http_client
+
+
+class FakeTransport:
+    def __init__(self):
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return type("Response", (), {"status_code": 200})()
+
+
+def test_shared_client_uses_transport_and_reports_timing(monkeypatch):
+    transport = FakeTransport()
+    events = []
+    monkeypatch.setattr(http_client.get_client(), "transport", transport)
+    http_client.add_timing_hook(events.append)
+    try:
+        http_client.get("https://example.com/feed", timeout=5)
+        http_client.post("https://llm.example.com/v1", json={"a": 1})
+    finally:
+        http_client.remove_timing_hook(events.append)
+    assert [call[0] for call in transport.calls] == ["GET", "POST"]
+    assert transport.calls[0][2] == {"timeout": 5}
+    assert [event["host"] for event in events] == ["example.com", "llm.example.com"]
+    assert all(event["status"] == 200 and event["elapsed"] >= 0 for event in events)
+
+
+def test_shared_client_reuses_pooled_session():
+    client = http_client.HttpClient(pool_maxsize=3, retries=1)
+    session = client.session()
+    assert client.session() is session
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == 3
+    assert adapter.max_retries.total == 1
+    client.close()
+
+
+def test_retry_after_is_capped_and_x_rate_limits_are_not_retried():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            self.send_response(429 if self.path.startswith("/x") else 503)
+            self.send_header("Retry-After", "3600")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    client = http_client.HttpClient(retries=2, backoff_factor=0, max_retry_after=0.1)
+    session = client.session()
+    session.mount(f"{base}/x", session.get_adapter(http_client.X_API_PREFIXES[0]))
+    try:
+        started = time.monotonic()
+        response = client.request("GET", f"{base}/feed", timeout=5)
+        elapsed = time.monotonic() - started
+        x_response = client.request("GET", f"{base}/x/tweets", timeout=5)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+    assert response.status_code == 503
+    assert elapsed < 2
+    assert x_response.status_code == 429
+    assert hits == ["/feed", "/feed", "/feed", "/x/tweets"]
+    adapter = session.get_adapter("https://example.com")
+    assert adapter.max_retries.read == 0
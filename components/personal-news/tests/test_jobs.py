@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+
+import pytest
+
+from personal_news import jobs
+from utils import BoundedWorkerPool, PoolFull
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    release = threading.Event()
+
+    def fake_stream(payload):
+        if payload["config"].get("fail"):
+            raise RuntimeError("LLM API error")
+        yield "今日要闻，"
+        release.wait(5)
+        yield "天气晴。"
+
+    monkeypatch.setattr(jobs, "stream_broadcast_script", fake_stream)
+    manager = jobs.JobManager(max_workers=1, max_queue=1, max_jobs=3, ttl_seconds=60)
+    manager.release = release
+    yield manager
+    release.set()
+    manager.shutdown()
+    jobs.reset_job_manager()
+
+
+def _events(stream):
+    parsed = []
+    for raw in stream:
+        lines = raw.decode("utf-8").strip().splitlines()
+        event = next((line[7:] for line in lines if line.startswith("event: ")), "message")
+        data = next((json.loads(line[6:]) for line in lines if line.startswith("data: ")), None)
+        parsed.append((event, data))
+    return parsed
+
+
+def test_job_runs_in_background_and_streams_progress(manager):
+    job = manager.submit({}, [])
+    assert job["status"] in (jobs.QUEUED, jobs.RUNNING)
+    threading.Timer(0.05, manager.release.set).start()
+    events = _events(manager.events(job["id"]))
+    assert ("message", {"text": "今日要闻，"}) in events
+    assert ("message", {"text": "天气晴。"}) in events
+    assert events[-1] == ("done", {"script": "今日要闻，天气晴。"})
+    finished = manager.get(job["id"])
+    assert finished["status"] == jobs.SUCCEEDED
+    assert finished["progress"] == {"chunks": 2, "chars": 9}
+
+
+def test_failed_job_reports_error(manager):
+    job = manager.submit({"fail": True}, [])
+    events = _events(manager.events(job["id"]))
+    assert events[-1] == ("error", {"error": "LLM API error"})
+    assert manager.get(job["id"])["status"] == jobs.FAILED
+
+
+def test_job_admission_and_bounded_store(manager):
+    first = manager.submit({}, [])
+    manager.submit({}, [])
+    with pytest.raises(PoolFull):
+        manager.submit({}, [])
+    assert manager.stats()["pool"]["rejected"] == 1
+    manager.release.set()
+    list(manager.events(first["id"]))
+    for _ in range(3):
+        job = manager.submit({"fail": True}, [])
+        list(manager.events(job["id"]))
+    assert manager.stats()["stored"] == 3
+    assert manager.get(first["id"]) is None
+    assert manager.stats()["evicted"] >= 1
+
+
+def test_shared_pool_counts_jobs_against_generation_capacity(monkeypatch):
+    release = threading.Event()
+
+    def fake_stream(payload):
+        release.wait(5)
+        yield "稿件"
+
+    monkeypatch.setattr(jobs, "stream_broadcast_script", fake_stream)
+    pool = BoundedWorkerPool(max_workers=1, max_queue=0, name="generate")
+    manager = jobs.JobManager(pool=pool)
+    try:
+        job = manager.submit({}, [])
+        with pytest.raises(PoolFull):
+            pool.submit(lambda: None)
+        release.set()
+        list(manager.events(job["id"]))
+        manager.shutdown()
+        deadline = time.monotonic() + 5
+        while pool.stats()["in_flight"]:
+            assert time.monotonic() < deadline, "job worker was not released"
+            time.sleep(0.01)
+        assert pool.submit(lambda: "still open").result(5) == "still open"
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_reset_job_manager_discards_configured_manager():
+    configured = jobs.configure_job_manager(max_workers=1, max_queue=1)
+    jobs.reset_job_manager()
+    try:
+        assert jobs.get_job_manager() is not configured
+        assert jobs.get_job_manager().stats()["stored"] == 0
+    finally:
+        jobs.reset_job_manager()
@@ -0,0 +1,201 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import main
+from rss.cache import reset_feed_cache
+from utils.source_health import reset_source_health
+
+ROOT = Path(__file__).resolve().parents[1]
+
+FEED = (
+    "<rss><channel><title>Daily</title>"
+    "<item><title>fast</title><link>https://example.com/fast</link></item>"
+    "<item><title>slow</title><link>https://example.com/slow</link></item>"
+    "</channel></rss>"
+)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.status_code = 200
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        yield self.text.encode("utf-8")
+
+    def close(self):
+        pass
+
+
+def test_collect_inputs_drops_sources_that_miss_the_budget(monkeypatch):
+    release = threading.Event()
+    seen_configs = []
+
+    def fast_rss(config, report=None):
+        seen_configs.append(config)
+        report["timed_out"] = ["https://slow.example.com/rss"]
+        return [{"title": "Story"}]
+
+    def slow_x(config, report=None):
+        assert threading.current_thread().daemon
+        release.wait(5)
+        return [{"text": "late"}]
+
+    def failing_weather(config):
+        raise SyntaxError("not well-formed")
+
+    monkeypatch.setattr(
+        main,
+        "SECTION_FETCHERS",
+        (("rss", fast_rss), ("x", slow_x), ("weather", failing_weather)),
+    )
+    started = time.monotonic()
+    try:
+        inputs, report = main.collect_inputs({"max_collect_seconds": 0.2})
+    finally:
+        release.set()
+    assert time.monotonic() - started < 2
+    assert inputs == [{"source": "rss", "items": [{"title": "Story"}]}]
+    assert report["dropped"] == ["x"]
+    assert report["failed"] == ["weather"]
+    assert report["partial"] == ["rss"]
+    assert seen_configs[0]["rss_fetch_deadline_seconds"] < 0.2
+    rss_config = seen_configs[0]
+    assert rss_config["rss_fetch_deadline_seconds"] + rss_config["rss_full_text_deadline_seconds"] <= 0.2
+
+
+
+def test_collect_inputs_keeps_partially_timed_out_rss(monkeypatch, http_transport, tmp_path):
+    release = threading.Event()
+
+    def fake_get(url, **kwargs):
+        if url == "https://example.com/rss":
+            return FakeResponse(FEED)
+        release.wait(5)
+        return FakeResponse("<html><body><p>Article body.</p></body></html>")
+
+    http_transport.get = fake_get
+    monkeypatch.setattr(main, "SECTION_FETCHERS", (("rss", main.fetch_rss_items),))
+    reset_feed_cache()
+    reset_source_health()
+    try:
+        inputs, report = main.collect_inputs(
+            {
+                "max_collect_seconds": 1.0,
+                "rss_sources": ["https://example.com/rss", "https://slow.example.com/rss"],
+                "rss_fetch_full_text": True,
+                "cache_dir": str(tmp_path),
+            }
+        )
+    finally:
+        release.set()
+        reset_feed_cache()
+        reset_source_health()
+    assert report["dropped"] == []
+    assert report["partial"] == ["rss"]
+    assert [item["title"] for item in inputs[0]["items"]] == ["fast", "slow"]
+
+
+def test_process_exits_without_waiting_for_hung_fetches(tmp_path):
+    script = f"""
+import sys
+import time
+
+sys.path[:0] = [{str(ROOT)!r}, {str(ROOT.parent)!r}]
+
+import main
+from utils import http_client
+
+
+class HungTransport:
+    def request(self, method, url, **kwargs):
+        time.sleep(60)
+
+
+http_client.set_transport(HungTransport())
+main.SECTION_FETCHERS = (("rss", main.fetch_rss_items),)
+_, report = main.collect_inputs(
+    {{
+        "max_collect_seconds": 0.5,
+        "rss_sources": ["https://a.example.com/rss", "https://b.example.com/rss"],
+        "cache_dir": {str(tmp_path)!r},
+    }}
+)
+print(report["partial"])
+"""
+    started = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['rss']"
+    assert time.monotonic() - started < 10
+
+def test_build_inputs_keeps_source_order(monkeypatch):
+    def delayed(source, delay):
+        def fetch(config, report=None):
+            time.sleep(delay)
+            return [{"source_marker": source}]
+
+        return fetch
+
+    monkeypatch.setattr(
+        main,
+        "SECTION_FETCHERS",
+        (("rss", delayed("rss", 0.05)), ("x", delayed("x", 0)), ("weather", delayed("weather", 0.02))),
+    )
+    inputs = main.build_inputs({})
+    assert [block["source"] for block in inputs] == ["rss", "x", "weather"]
+
+
+def test_generate_pipelined_treats_failed_section_as_empty(monkeypatch, tmp_path, capsys):
+    def failing_x(config):
+        raise ValueError("bad payload")
+
+    monkeypatch.setattr(
+        main,
+        "SECTION_FETCHERS",
+        (("rss", lambda config: [{"title": "Story"}]), ("x", failing_x), ("weather", lambda config: [])),
+    )
+    monkeypatch.setattr(
+        main, "generate_section_script", lambda block, config, report=None, budget_share=1.0: f"{block['source']}稿"
+    )
+    monkeypatch.setattr(main, "assemble_broadcast_script", lambda sections, config: sections)
+    sections = main.generate_pipelined({}, tmp_path)
+    assert sections == {"rss": "rss稿", "x": "", "weather": ""}
+    assert '"section_failed": "x"' in capsys.readouterr().err
+
+
+def test_generate_pipelined_drops_stories_already_sent_and_splits_budget(monkeypatch, tmp_path):
+    launch = {"title": "SpaceX launches new Starship rocket from Texas", "source_name": "BBC"}
+    tweet = {"author": "SpaceX", "text": "Starship rocket launches from Starbase, Texas! SpaceX new flight test"}
+    other = {"author": "nasa", "text": "Artemis crew completes lunar training"}
+
+    def late_x(config):
+        time.sleep(0.1)
+        return [tweet, other]
+
+    calls = []
+
+    def fake_section(block, config, report=None, budget_share=1.0):
+        texts = [item.get("text") or item.get("title") for item in block["items"]]
+        calls.append((block["source"], texts, budget_share))
+        return f"{block['source']}稿"
+
+    monkeypatch.setattr(
+        main,
+        "SECTION_FETCHERS",
+        (("rss", lambda config: [launch]), ("x", late_x), ("weather", lambda config: [])),
+    )
+    monkeypatch.setattr(main, "generate_section_script", fake_section)
+    monkeypatch.setattr(main, "assemble_broadcast_script", lambda sections, config: sections)
+    assert main.generate_pipelined({}, tmp_path) == {"rss": "rss稿", "x": "x稿", "weather": ""}
+    assert sorted(calls) == [
+        ("rss", [launch["title"]], 1 / 3),
+        ("x", [other["text"]], 1 / 3),
+    ]
@@ -1,17 +1,41 @@
-from rss.client import fetch_rss_items
+import threading
+import time
+
+import pytest
+import requests
+
+from rss.cache import feed_cache_stats, get_feed_cache, reset_feed_cache
+from rss.client import feed_health_report, fetch_rss_items, last_fetch_report, mark_rss_items_seen
+from utils.source_health import reset_source_health
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    reset_feed_cache()
+    reset_source_health()
+    yield
 
 
 class FakeResponse:
-    def __init__(self, text, status_code=200):
+    def __init__(self, text, status_code=200, headers=None):
         self.text = text
         self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self):
         if self.status_code >= 400:
             raise RuntimeError("status error")
 
+    def iter_content(self, chunk_size=1):
+        data = self.text.encode("utf-8")
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
 
-def test_fetch_rss_items(monkeypatch):
+    def close(self):
+        pass
+
+
+def test_fetch_rss_items(http_transport):
     rss_text = """<?xml version="1.0" encoding="UTF-8"?>
     <rss version="2.0">
       <channel>
@@ -26,13 +50,331 @@ def test_fetch_rss_items(monkeypatch):
     </rss>
     """
 
-    def fake_get(url, timeout=10):
+    def fake_get(url, headers=None, timeout=10, stream=False):
         if url == "https://example.com/rss":
             return FakeResponse(rss_text)
         return FakeResponse("<html><body><p>Full story text.</p></body></html>")
 
-    monkeypatch.setattr("requests.get", fake_get)
-    items = fetch_rss_items({"rss_sources": ["https://example.com/rss"]})
+    http_transport.get = fake_get
+    items = fetch_rss_items(
+        {"rss_sources": ["https://example.com/rss"], "rss_fetch_full_text": True}
+    )
     assert items
     assert items[0]["source_name"] == "Example News"
     assert "Full story text." in items[0]["summary"]
+
+
+def _feed(title, *stories):
+    items = "".join(
+        f"<item><title>{story}</title><link>https://example.com/{story}</link></item>"
+        for story in stories
+    )
+    return f"<rss><channel><title>{title}</title>{items}</channel></rss>"
+
+
+def test_fetch_rss_items_concurrent_keeps_feed_order(http_transport):
+    feeds = {
+        "https://slow.example.com/rss": (0.2, _feed("Slow", "S1", "S2")),
+        "https://fast.example.com/rss": (0.0, _feed("Fast", "F1")),
+        "https://hung.example.com/rss": (5.0, _feed("Hung", "H1")),
+    }
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if url == "https://broken.example.com/rss":
+            raise requests.ConnectionError("boom")
+        delay, text = feeds[url]
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    http_transport.get = fake_get
+    started = time.monotonic()
+    items = fetch_rss_items(
+        {
+            "rss_sources": [
+                "https://slow.example.com/rss",
+                "https://broken.example.com/rss",
+                "https://hung.example.com/rss",
+                "https://fast.example.com/rss",
+            ],
+            "rss_max_workers": 4,
+            "rss_fetch_deadline_seconds": 1,
+        }
+    )
+    assert time.monotonic() - started < 2
+    assert [item["title"] for item in items] == ["S1", "S2", "F1"]
+
+
+def test_fetch_rss_items_reuses_cache_on_not_modified(http_transport, tmp_path):
+    calls = []
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        calls.append(headers or {})
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return FakeResponse("", status_code=304)
+        return FakeResponse(_feed("Cached", "C1"), headers={"ETag": '"v1"'})
+
+    http_transport.get = fake_get
+    config = {"rss_sources": ["https://example.com/rss"], "cache_dir": str(tmp_path)}
+    reset_feed_cache()
+    first = fetch_rss_items(config)
+    reset_feed_cache()
+    second = fetch_rss_items(config)
+    assert first == second
+    assert calls[1] == {"If-None-Match": '"v1"'}
+    assert feed_cache_stats()["hits"] == 1
+
+
+def test_full_text_does_not_modify_cached_feed_entries(http_transport):
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if url == "https://example.com/rss":
+            if (headers or {}).get("If-None-Match") == '"v1"':
+                return FakeResponse("", status_code=304)
+            return FakeResponse(_feed("Cached", "C1"), headers={"ETag": '"v1"'})
+        return FakeResponse("<html><body><p>Full article body.</p></body></html>")
+
+    http_transport.get = fake_get
+    config = {"rss_sources": ["https://example.com/rss"], "rss_fetch_full_text": True}
+    first = fetch_rss_items(config)
+    second = fetch_rss_items(config)
+    assert first[0]["summary"] == second[0]["summary"] == "Full article body."
+    cached = get_feed_cache(config).load("https://example.com/rss")
+    assert cached["items"][0]["summary"] == ""
+    assert cached["items"][0] is not first[0]
+
+
+def test_fetch_rss_items_streams_atom_and_caps_items(http_transport):
+    entries = "".join(
+        f"""<entry><title>Paper {index}</title><summary>Abstract {index}</summary>
+        <link rel="alternate" href="https://example.com/{index}"/>
+        <updated>2026-01-20T08:00:00Z</updated></entry>"""
+        for index in range(50)
+    )
+    atom_text = f"""<?xml version="1.0" encoding="utf-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom"><title>Example Atom</title>{entries}</feed>"""
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        return FakeResponse(atom_text)
+
+    http_transport.get = fake_get
+    items = fetch_rss_items(
+        {"rss_sources": ["https://example.com/atom"], "rss_max_items_per_feed": 3}
+    )
+    assert [item["title"] for item in items] == ["Paper 0", "Paper 1", "Paper 2"]
+    assert items[0]["source_name"] == "Example Atom"
+    assert items[0]["link"] == "https://example.com/0"
+
+
+def test_fetch_rss_items_ranks_before_full_text(http_transport):
+    def dated_feed(title, *stories):
+        items = "".join(
+            f"<item><title>{story}</title><link>https://{title}.example.com/{story}</link>"
+            f"<pubDate>{date}</pubDate></item>"
+            for story, date in stories
+        )
+        return f"<rss><channel><title>{title}</title>{items}</channel></rss>"
+
+    feeds = {
+        "https://old.example.com/rss": dated_feed(
+            "old",
+            ("Old1", "Mon, 01 Jan 2024 08:00:00 GMT"),
+            ("Old2", "Sun, 31 Dec 2023 08:00:00 GMT"),
+        ),
+        "https://new.example.com/rss": dated_feed(
+            "new",
+            ("New1", "Tue, 20 Jan 2099 08:00:00 GMT"),
+        ),
+    }
+    article_urls = []
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if url in feeds:
+            return FakeResponse(feeds[url])
+        article_urls.append(url)
+        return FakeResponse(f"<html><body><p>Full text of {url}</p></body></html>")
+
+    http_transport.get = fake_get
+    items = fetch_rss_items(
+        {
+            "rss_sources": list(feeds),
+            "rss_fetch_full_text": True,
+            "rss_top_k": 2,
+        }
+    )
+    assert [item["title"] for item in items] == ["New1", "Old1"]
+    assert items[0]["published_at"] == "2099-01-20T08:00:00+00:00"
+    assert sorted(article_urls) == ["https://new.example.com/New1", "https://old.example.com/Old1"]
+    assert items[1]["summary"] == "Full text of https://old.example.com/Old1"
+
+
+def test_top_k_defaults_off_without_full_text_and_failed_articles_are_skipped(monkeypatch, http_transport):
+    from rss import client
+
+    stories = [f"S{index}" for index in range(25)]
+    extract_text = client.extract_text
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if url.endswith("/rss"):
+            return FakeResponse(_feed("Daily", *stories))
+        return FakeResponse(f"<html><body><p>Full text of {url}</p></body></html>")
+
+    def flaky_extract(content, limit):
+        if "S1<" in content:
+            raise ValueError("broken page")
+        return extract_text(content, limit)
+
+    http_transport.get = fake_get
+    reset_feed_cache()
+    plain = fetch_rss_items({"rss_sources": ["https://daily.example.com/rss"]})
+    assert len(plain) == 25
+
+    monkeypatch.setattr(client, "extract_text", flaky_extract)
+    report = {}
+    detailed = fetch_rss_items(
+        {"rss_sources": ["https://daily.example.com/rss"], "rss_fetch_full_text": True}, report=report
+    )
+    assert len(detailed) == 20
+    by_title = {item["title"]: item for item in detailed}
+    assert by_title["S0"]["summary"] == "Full text of https://example.com/S0"
+    assert by_title["S1"].get("summary", "") == ""
+    assert report["full_text_timed_out"] == 0
+
+
+def test_article_summary_extraction_is_cached(monkeypatch, http_transport):
+    from rss import client
+    from rss.cache import article_cache_stats
+    from rss.html_text import extract_text
+
+    page = (
+        "<html><head><script>if (a < b) { s = '</p>'; }</script><style>p {}</style></head>"
+        "<body><noscript>Enable JS</noscript><p>Hello &amp; welcome</p>"
+        + "<p>filler text</p>" * 500
+        + "</body></html>"
+    )
+    assert extract_text(page, 20) == "Hello & welcome filler"
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        return FakeResponse(page)
+
+    extracted = []
+    http_transport.get = fake_get
+    monkeypatch.setattr(client, "extract_text", lambda *args: extracted.append(1) or extract_text(*args))
+    reset_feed_cache()
+    first = client._fetch_article_summary("https://example.com/a", {})
+    second = client._fetch_article_summary("https://example.com/a", {})
+    assert first == second
+    assert first.startswith("Hello & welcome filler text")
+    assert len(first) <= 360
+    assert extracted == [1]
+    assert article_cache_stats()["hits"] == 1
+
+
+def test_fetch_rss_items_only_new_since_last_run(http_transport, tmp_path):
+    feeds = iter([_feed("Daily", "A", "B"), _feed("Daily", "A", "B"), _feed("Daily", "C", "A", "B")])
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        return FakeResponse(next(feeds))
+
+    http_transport.get = fake_get
+    config = {
+        "rss_sources": ["https://daily.example.com/rss"],
+        "rss_only_new": True,
+        "rss_top_k": 1,
+        "cache_dir": str(tmp_path),
+    }
+    first = fetch_rss_items(config)
+    reset_feed_cache()
+    retried = fetch_rss_items(config)
+    mark_rss_items_seen(retried, config)
+    reset_feed_cache()
+    second = fetch_rss_items({**config, "rss_top_k": 0})
+    assert [item["title"] for item in first] == ["A"]
+    assert [item["title"] for item in retried] == ["A"]
+    assert [item["title"] for item in second] == ["C", "B"]
+    assert (tmp_path / "seen" / "items.sqlite3").exists()
+
+
+def test_fetch_rss_items_only_new_skips_items_published_before_last_success(http_transport, tmp_path):
+    rss_text = """<rss><channel><title>Daily</title>
+    <item><title>Old</title><link>https://example.com/old</link>
+    <pubDate>Mon, 06 Jan 2020 08:00:00 GMT</pubDate></item>
+    <item><title>Upcoming</title><link>https://example.com/upcoming</link>
+    <pubDate>Fri, 01 Jan 2099 08:00:00 GMT</pubDate></item>
+    <item><title>Undated</title><link>https://example.com/undated</link></item>
+    </channel></rss>"""
+    http_transport.get = lambda *args, **kwargs: FakeResponse(rss_text)
+    config = {
+        "rss_sources": ["https://daily.example.com/rss"],
+        "rss_only_new": True,
+        "cache_dir": str(tmp_path),
+    }
+    mark_rss_items_seen([], config)
+    items = fetch_rss_items(config)
+    assert sorted(item["title"] for item in items) == ["Undated", "Upcoming"]
+
+
+def test_fetch_rss_items_opens_circuit_and_backs_off_polling(http_transport):
+    calls = []
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        calls.append(url)
+        if "dead" in url:
+            raise requests.Timeout("timed out")
+        return FakeResponse(_feed("Static", "Same"))
+
+    http_transport.get = fake_get
+    config = {
+        "rss_sources": ["https://dead.example.com/rss", "https://static.example.com/rss"],
+        "source_failure_threshold": 2,
+    }
+    for _ in range(5):
+        items = fetch_rss_items(config)
+        assert [item["title"] for item in items] == ["Same"]
+    assert calls.count("https://dead.example.com/rss") == 2
+    assert calls.count("https://static.example.com/rss") == 3
+    report = {row["source"]: row for row in feed_health_report(config)}
+    assert report["https://dead.example.com/rss"]["circuit"] == "open"
+    assert report["https://static.example.com/rss"]["unchanged_runs"] == 2
+
+
+def test_fetch_rss_items_records_malformed_feed_as_failure(http_transport):
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if "broken" in url:
+            return FakeResponse("<rss><channel><title>Broken</title><item></channel></rss>")
+        return FakeResponse(_feed("Good", "G1"))
+
+    http_transport.get = fake_get
+    config = {"rss_sources": ["https://broken.example.com/rss", "https://good.example.com/rss"]}
+    items = fetch_rss_items(config)
+    assert [item["title"] for item in items] == ["G1"]
+    report = {row["source"]: row for row in feed_health_report(config)}
+    assert report["https://broken.example.com/rss"]["consecutive_failures"] == 1
+
+
+def test_full_text_fetch_stops_at_deadline(http_transport):
+    release = threading.Event()
+
+    def fake_get(url, headers=None, timeout=10, stream=False):
+        if url == "https://example.com/rss":
+            return FakeResponse(_feed("Daily", "fast", "slow"))
+        if url.endswith("/slow"):
+            release.wait(5)
+        return FakeResponse("<html><body><p>Article body.</p></body></html>")
+
+    http_transport.get = fake_get
+    report = {}
+    started = time.monotonic()
+    try:
+        items = fetch_rss_items(
+            {
+                "rss_sources": ["https://example.com/rss"],
+                "rss_fetch_full_text": True,
+                "rss_full_text_deadline_seconds": 0.2,
+            },
+            report=report,
+        )
+    finally:
+        release.set()
+    assert time.monotonic() - started < 2
+    assert {item["title"]: item["summary"] for item in items} == {"fast": "Article body.", "slow": ""}
+    assert report["full_text_timed_out"] == 1
+    assert last_fetch_report()["full_text_timed_out"] == 1
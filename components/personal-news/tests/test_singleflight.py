@@ -0,0 +1,74 @@
+import threading
+import time
+
+from utils.singleflight import SingleFlight, payload_key
+
+
+def _run_concurrently(flight, key, fn, count):
+    outcomes = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            outcome = flight.do(key, fn)
+        except RuntimeError as exc:
+            outcome = exc
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def _wait_for_followers(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.stats()["followers"] < count:
+        assert time.monotonic() < deadline, f"expected {count} followers, got {flight.stats()['followers']}"
+        time.sleep(0.01)
+
+
+def test_single_flight_coalesces_identical_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def generate():
+        calls.append(1)
+        release.wait(5)
+        return "稿件"
+
+    threads, outcomes = _run_concurrently(flight, "key", generate, 5)
+    _wait_for_followers(flight, 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+    assert {result for result, _ in outcomes} == {"稿件"}
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "followers": 4}
+    assert flight.do("key", lambda: "again") == ("again", False)
+
+
+def test_single_flight_shares_errors_with_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("LLM API error")
+
+    threads, outcomes = _run_concurrently(flight, "key", fail, 3)
+    _wait_for_followers(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+def test_payload_key_is_canonical():
+    first = payload_key({"config": {"a": 1, "b": 2}, "inputs": []})
+    second = payload_key({"inputs": [], "config": {"b": 2, "a": 1}})
+    assert first == second
+    assert first != payload_key({"config": {"a": 1}, "inputs": []})
@@ -14,7 +14,7 @@ class FakeResponse:
         return self._data
 
 
-def test_fetch_weather_builds_summary(monkeypatch):
+def test_fetch_weather_builds_summary(monkeypatch, http_transport):
     def fake_get(*args, **kwargs):
         return FakeResponse(
             {
@@ -25,8 +25,62 @@ def test_fetch_weather_builds_summary(monkeypatch):
         )
 
     monkeypatch.setenv("WEATHER_API_KEY", "test")
-    monkeypatch.setattr("requests.get", fake_get)
+    http_transport.get = fake_get
     items = fetch_weather({"city": "Beijing"})
     assert items
     assert "多云" in items[0]["summary"]
     assert "最高气温" in items[0]["summary"]
+
+
+def _wttr(desc, temp):
+    return {
+        "current_condition": [
+            {
+                "weatherDesc": [{"value": desc}],
+                "temp_C": temp,
+                "FeelsLikeC": temp,
+                "windspeedKmph": "10",
+            }
+        ]
+    }
+
+
+def test_fetch_weather_batch_dedupes_and_caches(http_transport):
+    from weather.client import fetch_weather_batch, reset_weather_cache, weather_cache_stats
+
+    calls = []
+
+    def fake_get(url, params=None, timeout=10):
+        calls.append(url)
+        return FakeResponse(_wttr("晴", "20"))
+
+    reset_weather_cache()
+    http_transport.get = fake_get
+    results = fetch_weather_batch(["Beijing", "beijing ", "Shanghai"], {})
+    assert sorted(calls) == ["https://wttr.in/Beijing", "https://wttr.in/Shanghai"]
+    assert results["beijing "] == results["Beijing"]
+    assert "当前气温20度" in results["Shanghai"][0]["summary"]
+    assert fetch_weather({"city": "Shanghai"}) == results["Shanghai"]
+    assert len(calls) == 2
+    assert weather_cache_stats()["fresh"] == 1
+
+
+def test_fetch_weather_serves_stale_on_error(http_transport):
+    import requests
+
+    from weather.client import reset_weather_cache
+
+    responses = [FakeResponse(_wttr("多云", "15"))]
+
+    def fake_get(url, params=None, timeout=10):
+        if responses:
+            return responses.pop()
+        raise requests.Timeout("slow wttr.in")
+
+    reset_weather_cache()
+    http_transport.get = fake_get
+    config = {"city": "Beijing", "weather_cache_ttl_seconds": 0, "weather_stale_ttl_seconds": 0}
+    first = fetch_weather(config)
+    assert first and "多云" in first[0]["summary"]
+    assert fetch_weather(config) == first
+    assert fetch_weather({"city": "Tokyo"}) == []
@@ -0,0 +1,152 @@
+import gzip
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from personal_news import jobs
+from web import app as web_app
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), web_app.NewsRequestHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    web_app.configure_generation_pool()
+    jobs.reset_job_manager()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    return urllib.request.urlopen(request, timeout=5)
+
+
+def test_generation_runs_on_bounded_pool_with_admission_control(server, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    calls = []
+
+    def slow_generate(config, inputs):
+        calls.append(config)
+        started.set()
+        release.wait(5)
+        return "稿件"
+
+    monkeypatch.setattr(web_app, "generate_broadcast", slow_generate)
+    web_app.configure_generation_pool(max_workers=1, max_queue=0, retry_after=7)
+    results = {}
+
+    def request(name):
+        with _post(f"{server}/api/generate", {"config": {}, "inputs": []}) as response:
+            results[name] = (json.loads(response.read()), response.headers.get("X-Coalesced"))
+
+    workers = [threading.Thread(target=request, args=(name,)) for name in ("first", "duplicate")]
+    workers[0].start()
+    try:
+        assert started.wait(5)
+        workers[1].start()
+        with urllib.request.urlopen(f"{server}/api/readme", timeout=2) as response:
+            assert "content" in json.loads(response.read())
+        with pytest.raises(urllib.error.HTTPError) as busy:
+            _post(f"{server}/api/generate", {"config": {"mode": "evening"}, "inputs": []})
+        assert busy.value.code == 503
+        assert busy.value.headers["Retry-After"] == "7"
+        with urllib.request.urlopen(f"{server}/api/metrics", timeout=2) as response:
+            metrics = json.loads(response.read())
+        assert metrics["generation"]["in_flight"] == 1
+        assert metrics["generation"]["queued"] == 0
+        assert metrics["generation"]["rejected"] == 1
+        deadline = time.monotonic() + 5
+        while web_app._GENERATE_FLIGHT.stats()["followers"] < 1:
+            assert time.monotonic() < deadline, "duplicate request was not coalesced"
+            time.sleep(0.01)
+    finally:
+        release.set()
+        for worker in workers:
+            worker.join(5)
+    assert results["first"] == ({"script": "稿件"}, None)
+    assert results["duplicate"] == ({"script": "稿件"}, "1")
+    assert calls == [{}]
+
+
+def test_job_endpoints_return_id_then_result(server, monkeypatch):
+    monkeypatch.setattr(jobs, "stream_broadcast_script", lambda payload: iter(["稿件"]))
+    jobs.configure_job_manager(max_workers=1, max_queue=1)
+    with _post(f"{server}/api/jobs", {"config": {}, "inputs": []}) as response:
+        assert response.status == 202
+        job = json.loads(response.read())["job"]
+        assert response.headers["Location"] == f"/api/jobs/{job['id']}"
+    with urllib.request.urlopen(f"{server}/api/jobs/{job['id']}/events", timeout=5) as response:
+        body = response.read().decode("utf-8")
+    assert body.endswith('event: done\ndata: {"script": "稿件"}\n\n')
+    with urllib.request.urlopen(f"{server}/api/jobs/{job['id']}", timeout=5) as response:
+        assert json.loads(response.read())["job"]["script"] == "稿件"
+    with pytest.raises(urllib.error.HTTPError) as missing:
+        urllib.request.urlopen(f"{server}/api/jobs/{'0' * 32}", timeout=5)
+    assert missing.value.code == 404
+
+
+def test_static_assets_use_etag_gzip_and_api_only_no_store(server):
+    request = urllib.request.Request(f"{server}/styles.css", headers={"Accept-Encoding": "gzip"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        body = response.read()
+        etag = response.headers["ETag"]
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(body) == (web_app.STATIC_DIR / "styles.css").read_bytes()
+    assert etag.endswith('-gzip"')
+    with urllib.request.urlopen(f"{server}/styles.css", timeout=5) as response:
+        assert response.headers["ETag"] == etag.replace("-gzip", "")
+    conditional = urllib.request.Request(
+        f"{server}/styles.css",
+        headers={"If-None-Match": etag, "Accept-Encoding": "gzip"},
+    )
+    with pytest.raises(urllib.error.HTTPError) as cached:
+        urllib.request.urlopen(conditional, timeout=5)
+    assert cached.value.code == 304
+    assert cached.value.headers["ETag"] == etag
+    with urllib.request.urlopen(f"{server}/api/readme", timeout=5) as response:
+        assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_stream_rejects_malformed_payload(server):
+    with pytest.raises(urllib.error.HTTPError) as invalid:
+        _post(f"{server}/api/generate/stream", {"config": [], "inputs": {}})
+    assert invalid.value.code == 400
+
+
+def test_stream_stops_producer_when_client_disconnects(server, monkeypatch):
+    closed = threading.Event()
+
+    def endless(config, inputs):
+        try:
+            while True:
+                yield "段落" * 1024
+        finally:
+            closed.set()
+
+    monkeypatch.setattr(web_app, "stream_broadcast", endless)
+    response = _post(f"{server}/api/generate/stream", {"config": {}, "inputs": []})
+    assert response.read(1024)
+    response.close()
+    assert closed.wait(5)
+    deadline = time.monotonic() + 5
+    while web_app.generation_pool().stats()["in_flight"]:
+        assert time.monotonic() < deadline, "producer still running after disconnect"
+        time.sleep(0.01)
@@ -1,10 +1,23 @@
-from x.client import fetch_x_items
+import pytest
+import requests
+
+from x.client import fetch_x_items, mark_x_items_seen
+from x.timeline import last_fetch_report, reset_timeline_state
+from x.user_cache import reset_user_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches():
+    reset_user_cache()
+    reset_timeline_state()
+    yield
 
 
 class FakeResponse:
-    def __init__(self, data, status_code=200):
+    def __init__(self, data, status_code=200, headers=None):
         self._data = data
         self.status_code = status_code
+        self.headers = headers or {}
 
     def raise_for_status(self):
         if self.status_code >= 400:
@@ -14,10 +27,10 @@ class FakeResponse:
         return self._data
 
 
-def test_fetch_x_items(monkeypatch):
+def test_fetch_x_items(monkeypatch, http_transport):
     def fake_get(url, headers=None, params=None, timeout=10):
-        if "users/by/username" in url:
-            return FakeResponse({"data": {"id": "123"}})
+        if url.endswith("/users/by"):
+            return FakeResponse({"data": [{"id": "123", "username": "alice"}]})
         return FakeResponse(
             {
                 "data": [
@@ -31,7 +44,113 @@ def test_fetch_x_items(monkeypatch):
         )
 
     monkeypatch.setenv("X_BEARER_TOKEN", "token")
-    monkeypatch.setattr("requests.get", fake_get)
+    http_transport.get = fake_get
     items = fetch_x_items({"x_priority_accounts": ["alice"]})
     assert items
     assert items[0]["engagement"]["likes"] == 5
+
+
+def test_fetch_x_items_resolves_usernames_in_bulk_and_caches(monkeypatch, http_transport, tmp_path):
+    lookups = []
+
+    def fake_get(url, headers=None, params=None, timeout=10):
+        if url.endswith("/users/by"):
+            lookups.append(params["usernames"])
+            names = params["usernames"].split(",")
+            return FakeResponse(
+                {"data": [{"id": str(100 + i), "username": name} for i, name in enumerate(names)]}
+            )
+        return FakeResponse({"data": []})
+
+    monkeypatch.setenv("X_BEARER_TOKEN", "token")
+    http_transport.get = fake_get
+    config = {"x_priority_accounts": ["alice", "Bob", "42"], "cache_dir": str(tmp_path)}
+    fetch_x_items(config)
+    reset_user_cache()
+    fetch_x_items(config)
+    assert lookups == ["alice,Bob"]
+    assert (tmp_path / "x" / "users.json").exists()
+
+
+def test_fetch_x_items_negatively_caches_unresolved_usernames(monkeypatch, http_transport):
+    lookups = []
+    fail = [True]
+
+    def fake_get(url, headers=None, params=None, timeout=10):
+        if url.endswith("/users/by"):
+            lookups.append(params["usernames"])
+            if fail[0]:
+                raise requests.ConnectionError("down")
+            return FakeResponse(
+                {
+                    "data": [{"id": "100", "username": "alice"}],
+                    "errors": [{"value": "ghost", "title": "Not Found Error"}],
+                }
+            )
+        return FakeResponse({"data": []})
+
+    monkeypatch.setenv("X_BEARER_TOKEN", "token")
+    http_transport.get = fake_get
+    config = {"x_priority_accounts": ["alice", "ghost"]}
+    fetch_x_items(config)
+    fail[0] = False
+    fetch_x_items(config)
+    fetch_x_items(config)
+    fetch_x_items({**config, "x_user_missing_ttl_seconds": 0})
+    assert lookups == ["alice,ghost", "alice,ghost", "ghost"]
+
+
+def test_fetch_x_items_uses_since_id_and_respects_rate_limit(monkeypatch, http_transport):
+    import time
+
+    reset_at = str(int(time.time()) + 900)
+    timeline_calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=10):
+        if url.endswith("/users/by"):
+            names = params["usernames"].split(",")
+            return FakeResponse(
+                {"data": [{"id": str(100 + i), "username": name} for i, name in enumerate(names)]}
+            )
+        timeline_calls.append((url, params.get("since_id")))
+        remaining = str(max(2 - len(timeline_calls), 0))
+        return FakeResponse(
+            {"data": [{"id": "900", "text": "new"}]},
+            headers={"x-rate-limit-remaining": remaining, "x-rate-limit-reset": reset_at},
+        )
+
+    monkeypatch.setenv("X_BEARER_TOKEN", "token")
+    http_transport.get = fake_get
+    config = {"x_priority_accounts": ["alice"], "x_max_workers": 1, "x_incremental": True}
+    first = fetch_x_items(config)
+    mark_x_items_seen(first, config)
+    second = fetch_x_items(config)
+    third = fetch_x_items(config)
+    assert [item["id"] for item in first + second] == ["900", "900"]
+    assert timeline_calls[0] == ("https://api.x.com/2/users/100/tweets", None)
+    assert timeline_calls[1] == ("https://api.x.com/2/users/100/tweets", "900")
+    assert third == []
+    report = last_fetch_report()
+    assert report["deferred"] == ["alice"]
+    assert report["requests"] == 0
+    assert report["rate_limit_remaining"] == 0
+
+
+def test_fetch_x_items_keeps_since_id_until_run_succeeds(monkeypatch, http_transport):
+    timeline_calls = []
+
+    def fake_get(url, headers=None, params=None, timeout=10):
+        if url.endswith("/users/by"):
+            return FakeResponse({"data": [{"id": "100", "username": "alice"}]})
+        timeline_calls.append(params.get("since_id"))
+        return FakeResponse({"data": [{"id": "900", "text": "new"}]})
+
+    monkeypatch.setenv("X_BEARER_TOKEN", "token")
+    http_transport.get = fake_get
+    incremental = {"x_priority_accounts": ["alice"], "x_incremental": True}
+    fetch_x_items(incremental)
+    fetch_x_items(incremental)
+    full = {"x_priority_accounts": ["alice"]}
+    mark_x_items_seen(fetch_x_items(full), full)
+    fetch_x_items(full)
+    assert timeline_calls == [None, None, None, None]
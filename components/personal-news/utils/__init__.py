@@ -1,3 +1,15 @@
 from .env_loader import load_env_file
+from .lru import LRUCache
+from .storage import read_json, resolve_cache_dir, write_json
+from .worker_pool import BoundedWorkerPool, DaemonThreadPool, PoolFull
 
-__all__ = ["load_env_file"]
+__all__ = [
+    "BoundedWorkerPool",
+    "DaemonThreadPool",
+    "LRUCache",
+    "PoolFull",
+    "load_env_file",
+    "read_json",
+    "resolve_cache_dir",
+    "write_json",
+]
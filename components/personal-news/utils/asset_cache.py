@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MAX_ENTRIES = 256
+MIN_COMPRESS_BYTES = 512
+ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+class Asset:
+    def __init__(self, path: Path, body: bytes, mtime_ns: int, content_type: str) -> None:
+        self.path = path
+        self.body = body
+        self.mtime_ns = mtime_ns
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.last_modified = formatdate(mtime_ns / 1e9, usegmt=True)
+        self.variants: Dict[str, bytes] = {}
+        if len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE_TYPES):
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body)
+            self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+    def encoded(self, accept_encoding: Optional[str]) -> tuple[Optional[str], bytes]:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if encoding in accepted and encoding in self.variants:
+                return encoding, self.variants[encoding]
+        return None, self.body
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        if not encoding:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        if if_none_match:
+            tags = [_base_tag(tag) for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError, IndexError):
+                return False
+            return int(self.mtime_ns / 1e9) <= since
+        return False
+
+
+class AssetCache:
+    def __init__(self, maxsize: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.maxsize = maxsize
+        self._assets: Dict[Path, Asset] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "loads": 0}
+
+    def load(self, path: Path) -> Optional[Asset]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if not path.is_file():
+            return None
+        with self._lock:
+            asset = self._assets.get(path)
+            if asset is not None and asset.mtime_ns == stat.st_mtime_ns and len(asset.body) == stat.st_size:
+                self._stats["hits"] += 1
+                return asset
+        try:
+            body = path.read_bytes()
+        except OSError:
+            return None
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        asset = Asset(path, body, stat.st_mtime_ns, content_type)
+        with self._lock:
+            if path not in self._assets and len(self._assets) >= self.maxsize:
+                self._assets.pop(next(iter(self._assets)))
+            self._assets[path] = asset
+            self._stats["loads"] += 1
+        return asset
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._assets), **self._stats}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._assets.clear()
+
+
+def _base_tag(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in ENCODINGS:
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+def _accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted[name.strip().lower()] = quality
+    return accepted
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_CONNECTIONS = 32
+DEFAULT_POOL_MAXSIZE = 8
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_MAX_RETRY_AFTER = 5.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+X_API_PREFIXES = ("https://api.x.com/", "https://api.twitter.com/")
+
+TimingHook = Callable[[Dict[str, Any]], None]
+
+
+class CappedRetry(Retry):
+    def __init__(
+        self,
+        *args: Any,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw: Any) -> "CappedRetry":
+        kw.setdefault("max_retry_after", self.max_retry_after)
+        return super().new(**kw)
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        if status_code not in (self.status_forcelist or ()):
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response: Any) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return max(0.0, min(retry_after, self.max_retry_after))
+
+
+class HttpClient:
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_after = max_retry_after
+        self._session: Optional[requests.Session] = None
+        self._lock = threading.Lock()
+        self._hooks: List[TimingHook] = []
+        self.transport: Any = None
+
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def add_timing_hook(self, hook: TimingHook) -> None:
+        self._hooks.append(hook)
+
+    def remove_timing_hook(self, hook: TimingHook) -> None:
+        if hook in self._hooks:
+            self._hooks.remove(hook)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        transport = self.transport or self.session()
+        started = time.perf_counter()
+        response = None
+        error: Optional[BaseException] = None
+        try:
+            response = transport.request(method, url, **kwargs)
+            return response
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            self._emit(method, url, response, error, time.perf_counter() - started)
+
+    def _emit(
+        self,
+        method: str,
+        url: str,
+        response: Any,
+        error: Optional[BaseException],
+        elapsed: float,
+    ) -> None:
+        if not self._hooks:
+            return
+        event = {
+            "method": method,
+            "url": url,
+            "host": urlparse(url).hostname or "",
+            "status": getattr(response, "status_code", None),
+            "elapsed": elapsed,
+            "error": type(error).__name__ if error else None,
+        }
+        for hook in list(self._hooks):
+            hook(event)
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = self._build_adapter(RETRY_STATUSES)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        x_statuses = tuple(status for status in RETRY_STATUSES if status != 429)
+        x_adapter = self._build_adapter(x_statuses)
+        for prefix in X_API_PREFIXES:
+            session.mount(prefix, x_adapter)
+        return session
+
+    def _build_adapter(self, statuses: Tuple[int, ...]) -> HTTPAdapter:
+        retry = CappedRetry(
+            total=self.retries,
+            read=0,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=statuses,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+            respect_retry_after_header=True,
+            max_retry_after=self.max_retry_after,
+        )
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=True,
+            max_retries=retry,
+        )
+
+
+_CLIENT = HttpClient()
+
+
+def get_client() -> HttpClient:
+    return _CLIENT
+
+
+def configure(
+    *,
+    pool_maxsize: Optional[int] = None,
+    retries: Optional[int] = None,
+    backoff_factor: Optional[float] = None,
+    max_retry_after: Optional[float] = None,
+) -> None:
+    if pool_maxsize is not None:
+        _CLIENT.pool_maxsize = int(pool_maxsize)
+    if retries is not None:
+        _CLIENT.retries = int(retries)
+    if backoff_factor is not None:
+        _CLIENT.backoff_factor = float(backoff_factor)
+    if max_retry_after is not None:
+        _CLIENT.max_retry_after = float(max_retry_after)
+    _CLIENT.close()
+
+
+def configure_from_config(config: Dict[str, Any]) -> None:
+    configure(
+        pool_maxsize=config.get("http_pool_maxsize"),
+        retries=config.get("http_retries"),
+        backoff_factor=config.get("http_backoff_factor"),
+        max_retry_after=config.get("http_max_retry_after"),
+    )
+
+
+def set_transport(transport: Any) -> None:
+    _CLIENT.transport = transport
+
+
+def add_timing_hook(hook: TimingHook) -> None:
+    _CLIENT.add_timing_hook(hook)
+
+
+def remove_timing_hook(hook: TimingHook) -> None:
+    _CLIENT.remove_timing_hook(hook)
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    return _CLIENT.request(method, url, **kwargs)
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return _CLIENT.request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return _CLIENT.request("POST", url, **kwargs)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .storage import resolve_cache_dir
+
+RETENTION_SECONDS = 30 * 24 * 3600
+QUERY_BATCH = 500
+
+_INDEXES: Dict[Optional[Path], "SeenIndex"] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def item_key(item: Dict[str, Any]) -> str:
+    identity = item.get("guid") or item.get("link") or "\0".join(
+        str(item.get(field, "")) for field in ("source_name", "author", "title", "text")
+    )
+    return hashlib.sha1(str(identity).encode("utf-8")).hexdigest()[:20]
+
+
+class SeenIndex:
+    def __init__(self, path: Optional[Path] = None) -> None:
+        target = ":memory:"
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            target = str(path)
+        self._conn = sqlite3.connect(target, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "source TEXT NOT NULL, key TEXT NOT NULL, first_seen REAL NOT NULL, "
+                "PRIMARY KEY (source, key)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "source TEXT PRIMARY KEY, last_success REAL NOT NULL)"
+            )
+
+    def filter_new(
+        self,
+        source: str,
+        items: List[Dict[str, Any]],
+        lookback_seconds: float = 0.0,
+        now: Optional[float] = None,
+        key: Callable[[Dict[str, Any]], str] = item_key,
+    ) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        keys = [key(item) for item in items]
+        first_seen = self._first_seen(source, keys)
+        cutoff = now - lookback_seconds
+        return [
+            item
+            for item, item_id in zip(items, keys)
+            if item_id not in first_seen or first_seen[item_id] >= cutoff
+        ]
+
+    def mark_seen(
+        self,
+        source: str,
+        items: Iterable[Dict[str, Any]],
+        now: Optional[float] = None,
+        key: Callable[[Dict[str, Any]], str] = item_key,
+    ) -> None:
+        now = time.time() if now is None else now
+        rows = [(source, key(item), now) for item in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO seen (source, key, first_seen) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (source, last_success) VALUES (?, ?)",
+                (source, now),
+            )
+            self._conn.execute(
+                "DELETE FROM seen WHERE source = ? AND first_seen < ?",
+                (source, now - RETENTION_SECONDS),
+            )
+
+    def last_success(self, source: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_success FROM runs WHERE source = ?", (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _first_seen(self, source: str, keys: List[str]) -> Dict[str, float]:
+        found: Dict[str, float] = {}
+        with self._lock:
+            for start in range(0, len(keys), QUERY_BATCH):
+                batch = keys[start : start + QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, first_seen FROM seen WHERE source = ? AND key IN ({placeholders})",
+                    [source, *batch],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+
+def get_seen_index(config: Dict[str, Any]) -> SeenIndex:
+    directory = resolve_cache_dir(config, "seen")
+    path = directory / "items.sqlite3" if directory is not None else None
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(path)
+        if index is None:
+            try:
+                index = SeenIndex(path)
+            except (OSError, sqlite3.Error):
+                index = SeenIndex(None)
+            _INDEXES[path] = index
+        return index
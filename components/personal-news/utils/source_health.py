@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .storage import read_json, resolve_cache_dir, write_json
+
+LATENCY_HISTORY = 20
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 300.0
+MAX_COOLDOWN_SECONDS = 6 * 3600.0
+UNCHANGED_RUNS_BEFORE_BACKOFF = 2
+DEFAULT_POLL_INTERVAL_SECONDS = 300.0
+DEFAULT_MAX_POLL_INTERVAL_SECONDS = 6 * 3600.0
+
+CIRCUIT_OPEN = "circuit_open"
+NOT_DUE = "not_due"
+
+_REGISTRY: Dict[Tuple[Optional[Path], str], "SourceHealth"] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+class SourceHealth:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown_seconds: float = DEFAULT_COOLDOWN_SECONDS,
+        adaptive_polling: bool = True,
+        max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL_SECONDS,
+    ) -> None:
+        self._path = path
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.adaptive_polling = adaptive_polling
+        self.max_poll_interval = max_poll_interval
+        self._lock = threading.Lock()
+        data = read_json(path) if path is not None else None
+        self._sources: Dict[str, Dict[str, Any]] = data if isinstance(data, dict) else {}
+
+    def should_fetch(self, source: str, now: Optional[float] = None) -> Tuple[bool, str]:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._sources.get(source)
+            if not state:
+                return True, ""
+            if state.get("open_until", 0) > now:
+                return False, CIRCUIT_OPEN
+            if self.adaptive_polling and state.get("next_poll_at", 0) > now:
+                return False, NOT_DUE
+        return True, ""
+
+    def record_success(
+        self,
+        source: str,
+        latency: float,
+        changed: bool,
+        now: Optional[float] = None,
+    ) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(source)
+            self._add_latency(state, latency)
+            state["consecutive_failures"] = 0
+            state["open_until"] = 0
+            state["last_success"] = now
+            if changed or not state.get("last_changed"):
+                state["last_changed"] = now
+                state["unchanged_runs"] = 0
+            else:
+                state["unchanged_runs"] = state.get("unchanged_runs", 0) + 1
+            state["next_poll_at"] = now + self._poll_interval(state["unchanged_runs"])
+
+    def record_failure(self, source: str, latency: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(source)
+            self._add_latency(state, latency)
+            failures = state.get("consecutive_failures", 0) + 1
+            state["consecutive_failures"] = failures
+            state["last_failure"] = now
+            if failures >= self.failure_threshold:
+                exponent = failures - self.failure_threshold
+                cooldown = min(self.cooldown_seconds * (2**exponent), MAX_COOLDOWN_SECONDS)
+                state["open_until"] = now + cooldown
+
+    def report(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        now = time.time() if now is None else now
+        with self._lock:
+            snapshot = {source: dict(state) for source, state in self._sources.items()}
+        rows = []
+        for source, state in sorted(snapshot.items()):
+            latencies = sorted(state.get("latencies", []))
+            if state.get("open_until", 0) > now:
+                circuit = "open"
+            elif state.get("consecutive_failures", 0) >= self.failure_threshold:
+                circuit = "half_open"
+            else:
+                circuit = "closed"
+            rows.append(
+                {
+                    "source": source,
+                    "circuit": circuit,
+                    "consecutive_failures": state.get("consecutive_failures", 0),
+                    "latency_p50_ms": _percentile_ms(latencies, 0.5),
+                    "latency_p95_ms": _percentile_ms(latencies, 0.95),
+                    "last_success": state.get("last_success"),
+                    "last_failure": state.get("last_failure"),
+                    "last_changed": state.get("last_changed"),
+                    "unchanged_runs": state.get("unchanged_runs", 0),
+                    "next_poll_at": state.get("next_poll_at"),
+                    "open_until": state.get("open_until") or None,
+                }
+            )
+        return rows
+
+    def save(self) -> None:
+        if self._path is None:
+            return
+        with self._lock:
+            snapshot = {source: dict(state) for source, state in self._sources.items()}
+        write_json(self._path, snapshot)
+
+    def _state(self, source: str) -> Dict[str, Any]:
+        return self._sources.setdefault(source, {"latencies": []})
+
+    def _add_latency(self, state: Dict[str, Any], latency: float) -> None:
+        latencies = state.setdefault("latencies", [])
+        latencies.append(round(latency, 4))
+        del latencies[:-LATENCY_HISTORY]
+
+    def _poll_interval(self, unchanged_runs: int) -> float:
+        if not self.adaptive_polling or unchanged_runs < UNCHANGED_RUNS_BEFORE_BACKOFF:
+            return 0.0
+        exponent = unchanged_runs - UNCHANGED_RUNS_BEFORE_BACKOFF
+        return min(DEFAULT_POLL_INTERVAL_SECONDS * (2**exponent), self.max_poll_interval)
+
+
+def _percentile_ms(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return round(values[index] * 1000, 1)
+
+
+def get_source_health(config: Dict[str, Any], name: str) -> SourceHealth:
+    directory = resolve_cache_dir(config, "health")
+    path = directory / f"{name}.json" if directory is not None else None
+    with _REGISTRY_LOCK:
+        health = _REGISTRY.get((path, name))
+        if health is None:
+            health = SourceHealth(path)
+            _REGISTRY[(path, name)] = health
+    health.failure_threshold = int(
+        config.get("source_failure_threshold", DEFAULT_FAILURE_THRESHOLD)
+    )
+    health.cooldown_seconds = float(
+        config.get("source_cooldown_seconds", DEFAULT_COOLDOWN_SECONDS)
+    )
+    health.adaptive_polling = bool(config.get("source_adaptive_polling", True))
+    health.max_poll_interval = float(
+        config.get("source_max_poll_interval_seconds", DEFAULT_MAX_POLL_INTERVAL_SECONDS)
+    )
+    return health
+
+
+def reset_source_health() -> None:
+    with _REGISTRY_LOCK:
+        _REGISTRY.clear()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def resolve_cache_dir(config: Dict[str, Any], name: str) -> Optional[Path]:
+    base = config.get("cache_dir") or os.getenv("PERSONAL_NEWS_CACHE_DIR")
+    if not base:
+        return None
+    return Path(base).expanduser() / name
+
+
+def read_json(path: Path) -> Optional[Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: Path, data: Any) -> bool:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        os.replace(tmp_name, path)
+    except OSError:
+        return False
+    return True
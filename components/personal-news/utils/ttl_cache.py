@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from .storage import read_json, write_json
+
+
+class TTLCache:
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        maxsize: int = 256,
+        directory: Optional[Path] = None,
+    ) -> None:
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._maxsize = max(int(maxsize), 1)
+        self._directory = directory
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._refreshing: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "stale": 0, "misses": 0, "errors": 0}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None:
+            age = now - entry[0]
+            if age < self.ttl:
+                self._count("fresh")
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale")
+                self._refresh_in_background(key, loader)
+                return entry[1]
+        with self._key_lock(key):
+            entry = self._lookup(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._count("fresh")
+                return entry[1]
+            self._count("misses")
+            try:
+                value = loader()
+            except Exception:
+                self._count("errors")
+                if entry is not None:
+                    return entry[1]
+                raise
+            self._store(key, value)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            for name in self.stats:
+                self.stats[name] = 0
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self._store(key, loader())
+            except Exception:
+                self._count("errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="ttl-cache-refresh", daemon=True).start()
+
+    def _lookup(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None or self._directory is None:
+            return entry
+        data = read_json(self._path(key))
+        if not isinstance(data, dict) or "stored_at" not in data:
+            return None
+        entry = (float(data["stored_at"]), data.get("value"))
+        with self._lock:
+            self._entries.setdefault(key, entry)
+        return entry
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        stored_at = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (stored_at, value)
+            while len(self._entries) > self._maxsize:
+                self._entries.pop(next(iter(self._entries)))
+        if self._directory is not None:
+            write_json(self._path(key), {"stored_at": stored_at, "value": value})
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return self._directory / f"{digest}.json"
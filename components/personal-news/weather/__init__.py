@@ -1,3 +1,3 @@
-from .client import fetch_weather
+from .client import fetch_weather, fetch_weather_batch, weather_cache_stats
 
-__all__ = ["fetch_weather"]
+__all__ = ["fetch_weather", "fetch_weather_batch", "weather_cache_stats"]
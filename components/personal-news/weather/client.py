@@ -1,15 +1,24 @@
 from __future__ import annotations
 
-import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from utils import load_env_file
+from utils import http_client, load_env_file, resolve_cache_dir
+from utils.ttl_cache import TTLCache
+
+DEFAULT_TTL_SECONDS = 900.0
+DEFAULT_STALE_TTL_SECONDS = 3600.0
+DEFAULT_MAX_WORKERS = 4
+
+_CACHES: Dict[Tuple[Optional[Path], float, float], TTLCache] = {}
+_CACHES_LOCK = threading.Lock()
 
 
 def fetch_weather(config: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -17,20 +26,38 @@ def fetch_weather(config: Dict[str, Any]) -> List[Dict[str, Any]]:
     city = config.get("city")
     if not city:
         return []
+    return _weather_items(city, config)
+
+
+def fetch_weather_batch(cities: List[str], config: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    load_env_file(Path(__file__).resolve().parents[1] / "env.secret")
+    unique: Dict[str, str] = {}
+    for city in cities:
+        if city:
+            unique.setdefault(_normalize_city(city), city)
+    if not unique:
+        return {}
+    max_workers = int(config.get("weather_max_workers", DEFAULT_MAX_WORKERS) or 1)
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(unique)),
+        thread_name_prefix="weather-fetch",
+    ) as executor:
+        results = dict(
+            zip(unique, executor.map(lambda city: _weather_items(city, config), unique.values()))
+        )
+    return {city: results[_normalize_city(city)] for city in cities if city}
+
+
+def _weather_items(city: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
     provider = config.get("weather_provider", "wttr")
     if provider != "wttr":
         return []
-    response = requests.get(
-        f"https://wttr.in/{city}",
-        params={
-            "format": "j1",
-            "lang": "zh-cn",
-        },
-        timeout=10,
-    )
-    response.raise_for_status()
-    data = response.json()
-    summary = _build_summary(data)
+    lang = config.get("weather_lang", "zh-cn")
+    key = (_normalize_city(city), provider, lang)
+    try:
+        summary = _weather_cache(config).get_or_load(key, lambda: _fetch_wttr_summary(city, lang))
+    except (requests.RequestException, ValueError):
+        return []
     if not summary:
         return []
     return [
@@ -40,6 +67,50 @@ def fetch_weather(config: Dict[str, Any]) -> List[Dict[str, Any]]:
     ]
 
 
+def _fetch_wttr_summary(city: str, lang: str) -> Optional[str]:
+    response = http_client.get(
+        f"https://wttr.in/{city}",
+        params={
+            "format": "j1",
+            "lang": lang,
+        },
+        timeout=10,
+    )
+    response.raise_for_status()
+    return _build_summary(response.json())
+
+
+def _weather_cache(config: Dict[str, Any]) -> TTLCache:
+    directory = resolve_cache_dir(config, "weather")
+    ttl = float(config.get("weather_cache_ttl_seconds", DEFAULT_TTL_SECONDS))
+    stale_ttl = float(config.get("weather_stale_ttl_seconds", DEFAULT_STALE_TTL_SECONDS))
+    with _CACHES_LOCK:
+        cache = _CACHES.get((directory, ttl, stale_ttl))
+        if cache is None:
+            cache = TTLCache(ttl, stale_ttl, directory=directory)
+            _CACHES[(directory, ttl, stale_ttl)] = cache
+        return cache
+
+
+def weather_cache_stats() -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    for cache in caches:
+        for name, value in cache.stats.items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+def reset_weather_cache() -> None:
+    with _CACHES_LOCK:
+        _CACHES.clear()
+
+
+def _normalize_city(city: str) -> str:
+    return " ".join(city.split()).lower()
+
+
 def _build_summary(data: Dict[str, Any]) -> Optional[str]:
     current = (data.get("current_condition") or [{}])[0]
     weather_desc = (current.get("weatherDesc") or [{}])[0].get("value")
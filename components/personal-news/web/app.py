@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import json
+import queue
 import sys
+import threading
 from http import HTTPStatus
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 import re
@@ -15,18 +17,86 @@ PROJECT_DIR = BASE_DIR.parent
 
 sys.path.insert(0, str(PROJECT_DIR))
 
-from personal_news import generate_broadcast  # noqa: E402
+from personal_news import generate_broadcast, stream_broadcast  # noqa: E402
+from personal_news.jobs import DEFAULT_TTL_SECONDS, configure_job_manager, get_job_manager  # noqa: E402
+from personal_news.sse import sse_stream  # noqa: E402
+from utils import BoundedWorkerPool, PoolFull  # noqa: E402
+from utils.asset_cache import Asset, AssetCache  # noqa: E402
+from utils.singleflight import SingleFlight, payload_key  # noqa: E402
 
+DEFAULT_GENERATION_WORKERS = 4
+DEFAULT_GENERATION_QUEUE = 8
+DEFAULT_RETRY_AFTER_SECONDS = 5
+STREAM_QUEUE_SIZE = 64
+STREAM_POLL_SECONDS = 0.5
 
-def _json_response(handler: SimpleHTTPRequestHandler, status: int, payload: Dict[str, Any]) -> None:
+_POOL_LOCK = threading.Lock()
+_GENERATION_POOL: Optional[BoundedWorkerPool] = None
+_RETRY_AFTER_SECONDS = DEFAULT_RETRY_AFTER_SECONDS
+_GENERATE_FLIGHT = SingleFlight()
+_ASSETS = AssetCache()
+JOB_PATH = re.compile(r"/api/jobs/([0-9a-f]{32})(/events)?")
+
+
+def configure_generation_pool(
+    max_workers: int = DEFAULT_GENERATION_WORKERS,
+    max_queue: int = DEFAULT_GENERATION_QUEUE,
+    retry_after: int = DEFAULT_RETRY_AFTER_SECONDS,
+) -> BoundedWorkerPool:
+    global _GENERATION_POOL, _RETRY_AFTER_SECONDS
+    with _POOL_LOCK:
+        if _GENERATION_POOL is not None:
+            _GENERATION_POOL.shutdown(wait=False)
+        _GENERATION_POOL = BoundedWorkerPool(max_workers, max_queue, name="generate")
+        _RETRY_AFTER_SECONDS = retry_after
+        return _GENERATION_POOL
+
+
+def generation_pool() -> BoundedWorkerPool:
+    with _POOL_LOCK:
+        pool = _GENERATION_POOL
+    return pool or configure_generation_pool()
+
+
+def _generate_on_pool(config: Dict[str, Any], inputs: List[Dict[str, Any]]) -> str:
+    return generation_pool().submit(generate_broadcast, config, inputs).result()
+
+
+def _offer(events: queue.Queue, item: Optional[bytes], cancelled: threading.Event) -> bool:
+    while not cancelled.is_set():
+        try:
+            events.put(item, timeout=STREAM_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _json_response(
+    handler: SimpleHTTPRequestHandler,
+    status: int,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> None:
     data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json; charset=utf-8")
     handler.send_header("Content-Length", str(len(data)))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
     handler.end_headers()
     handler.wfile.write(data)
 
 
+def _busy_response(handler: SimpleHTTPRequestHandler) -> None:
+    _json_response(
+        handler,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        {"error": "Generation queue is full", "generation": generation_pool().stats()},
+        headers={"Retry-After": str(_RETRY_AFTER_SECONDS)},
+    )
+
+
 def _read_body(handler: SimpleHTTPRequestHandler) -> Dict[str, Any]:
     length = int(handler.headers.get("Content-Length", "0"))
     body = handler.rfile.read(length).decode("utf-8")
@@ -165,37 +235,200 @@ class NewsRequestHandler(SimpleHTTPRequestHandler):
         super().__init__(*args, directory=str(STATIC_DIR), **kwargs)
 
     def end_headers(self) -> None:
-        self.send_header("Cache-Control", "no-store")
+        if urlparse(self.path).path.startswith("/api/"):
+            self.send_header("Cache-Control", "no-store")
         super().end_headers()
 
+    def do_HEAD(self) -> None:
+        if urlparse(self.path).path == "/":
+            self.path = "/index.html"
+        if not self._serve_asset(head=True):
+            super().do_HEAD()
+
+    def _serve_asset(self, head: bool = False) -> bool:
+        asset = _ASSETS.load(Path(self.translate_path(self.path)))
+        if asset is None:
+            return False
+        encoding, body = asset.encoded(self.headers.get("Accept-Encoding"))
+        if asset.not_modified(self.headers.get("If-None-Match"), self.headers.get("If-Modified-Since")):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._asset_headers(asset, encoding)
+            self.end_headers()
+            return True
+        self.send_response(HTTPStatus.OK)
+        content_type = asset.content_type
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self._asset_headers(asset, encoding)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+        return True
+
+    def _asset_headers(self, asset: Asset, encoding: Optional[str]) -> None:
+        self.send_header("ETag", asset.etag_for(encoding))
+        self.send_header("Last-Modified", asset.last_modified)
+        self.send_header("Cache-Control", "no-cache")
+        if asset.variants:
+            self.send_header("Vary", "Accept-Encoding")
+
     def do_GET(self) -> None:
         parsed = urlparse(self.path)
         if parsed.path == "/api/readme":
             query = parse_qs(parsed.query)
             target = query.get("path", ["README.md"])[0]
             readme_path = _resolve_readme_path(target)
-            if not readme_path or not readme_path.exists():
+            readme = _ASSETS.load(readme_path) if readme_path else None
+            if readme is None:
                 _json_response(self, HTTPStatus.NOT_FOUND, {"error": "README not found"})
                 return
-            content = readme_path.read_text(encoding="utf-8")
-            _json_response(self, HTTPStatus.OK, {"content": content})
+            _json_response(self, HTTPStatus.OK, {"content": readme.text()})
+            return
+        if parsed.path == "/api/metrics":
+            _json_response(
+                self,
+                HTTPStatus.OK,
+                {
+                    "generation": generation_pool().stats(),
+                    "coalescing": _GENERATE_FLIGHT.stats(),
+                    "jobs": get_job_manager().stats(),
+                    "assets": _ASSETS.stats(),
+                },
+            )
+            return
+        match = JOB_PATH.fullmatch(parsed.path)
+        if match:
+            self._serve_job(match.group(1), events=bool(match.group(2)))
             return
         if parsed.path == "/":
             self.path = "/index.html"
+        if self._serve_asset():
+            return
         return super().do_GET()
 
+    def _serve_job(self, job_id: str, events: bool) -> None:
+        manager = get_job_manager()
+        job = manager.get(job_id)
+        if job is None:
+            _json_response(self, HTTPStatus.NOT_FOUND, {"error": "Job not found"})
+            return
+        if not events:
+            _json_response(self, HTTPStatus.OK, {"job": job})
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.end_headers()
+        for event in manager.events(job_id):
+            self.wfile.write(event)
+            self.wfile.flush()
+        self.close_connection = True
+
     def do_POST(self) -> None:
         parsed = urlparse(self.path)
+        if parsed.path == "/api/jobs":
+            try:
+                payload = _read_body(self)
+            except (ValueError, TypeError, json.JSONDecodeError) as exc:
+                _json_response(self, HTTPStatus.BAD_REQUEST, {"error": f"Invalid payload: {exc}"})
+                return
+            config = payload.get("config", {})
+            inputs = payload.get("inputs", [])
+            if not isinstance(config, dict) or not isinstance(inputs, list):
+                _json_response(
+                    self,
+                    HTTPStatus.BAD_REQUEST,
+                    {"error": "Invalid payload: config must be an object, inputs a list"},
+                )
+                return
+            try:
+                job = get_job_manager().submit(config, inputs)
+            except PoolFull:
+                _json_response(
+                    self,
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    {"error": "Job queue is full"},
+                    headers={"Retry-After": str(_RETRY_AFTER_SECONDS)},
+                )
+                return
+            _json_response(
+                self,
+                HTTPStatus.ACCEPTED,
+                {"job": job},
+                headers={"Location": f"/api/jobs/{job['id']}"},
+            )
+            return
         if parsed.path == "/api/generate":
             try:
                 payload = _read_body(self)
                 config = payload.get("config", {})
                 inputs = payload.get("inputs", [])
-                script = generate_broadcast(config, inputs)
+                script, shared = _GENERATE_FLIGHT.do(
+                    payload_key({"config": config, "inputs": inputs}),
+                    _generate_on_pool,
+                    config,
+                    inputs,
+                )
+            except PoolFull:
+                _busy_response(self)
+                return
+            except (ValueError, TypeError, json.JSONDecodeError) as exc:
+                _json_response(self, HTTPStatus.BAD_REQUEST, {"error": f"Invalid payload: {exc}"})
+                return
+            headers = {"X-Coalesced": "1"} if shared else None
+            _json_response(self, HTTPStatus.OK, {"script": script}, headers=headers)
+            return
+        if parsed.path == "/api/generate/stream":
+            try:
+                payload = _read_body(self)
             except (ValueError, TypeError, json.JSONDecodeError) as exc:
                 _json_response(self, HTTPStatus.BAD_REQUEST, {"error": f"Invalid payload: {exc}"})
                 return
-            _json_response(self, HTTPStatus.OK, {"script": script})
+            config = payload.get("config", {})
+            inputs = payload.get("inputs", [])
+            if not isinstance(config, dict) or not isinstance(inputs, list):
+                _json_response(
+                    self,
+                    HTTPStatus.BAD_REQUEST,
+                    {"error": "Invalid payload: config must be an object, inputs a list"},
+                )
+                return
+            events: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+            cancelled = threading.Event()
+
+            def produce() -> None:
+                stream = sse_stream(stream_broadcast(config, inputs))
+                try:
+                    for event in stream:
+                        if not _offer(events, event, cancelled):
+                            return
+                finally:
+                    stream.close()
+                    _offer(events, None, cancelled)
+
+            try:
+                generation_pool().submit(produce)
+            except PoolFull:
+                _busy_response(self)
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.end_headers()
+            try:
+                while True:
+                    event = events.get()
+                    if event is None:
+                        break
+                    self.wfile.write(event)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                cancelled.set()
+            self.close_connection = True
             return
         if parsed.path == "/api/run-tests":
             try:
@@ -204,20 +437,36 @@ class NewsRequestHandler(SimpleHTTPRequestHandler):
                 _json_response(self, HTTPStatus.BAD_REQUEST, {"error": f"Invalid payload: {exc}"})
                 return
             cases = payload.get("tests") if isinstance(payload, dict) else None
-            if cases:
-                results = _run_custom_tests(cases)
-            else:
-                results = _run_sample_tests()
+            try:
+                if cases:
+                    future = generation_pool().submit(_run_custom_tests, cases)
+                else:
+                    future = generation_pool().submit(_run_sample_tests)
+            except PoolFull:
+                _busy_response(self)
+                return
+            results = future.result()
             _json_response(self, HTTPStatus.OK, {"results": results})
             return
         _json_response(self, HTTPStatus.NOT_FOUND, {"error": "Unknown endpoint"})
 
 
 def main() -> None:
-    host = "127.0.0.1"
-    port = 5173
-    server = HTTPServer((host, port), NewsRequestHandler)
-    print(f"Serving helper UI at http://{host}:{port}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the personal news helper UI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5173)
+    parser.add_argument("--workers", type=int, default=DEFAULT_GENERATION_WORKERS)
+    parser.add_argument("--queue", type=int, default=DEFAULT_GENERATION_QUEUE)
+    parser.add_argument("--retry-after", type=int, default=DEFAULT_RETRY_AFTER_SECONDS)
+    parser.add_argument("--job-ttl", type=float, default=DEFAULT_TTL_SECONDS)
+    args = parser.parse_args()
+    pool = configure_generation_pool(args.workers, args.queue, args.retry_after)
+    configure_job_manager(pool=pool, ttl_seconds=args.job_ttl)
+    server = ThreadingHTTPServer((args.host, args.port), NewsRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving helper UI at http://{args.host}:{args.port}")
     server.serve_forever()
 
 
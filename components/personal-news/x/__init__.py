@@ -1,3 +1,4 @@
-from .client import fetch_x_items
+from .client import fetch_x_items, fetch_x_items_batch, mark_x_items_seen
+from .timeline import last_fetch_report
 
-__all__ = ["fetch_x_items"]
+__all__ = ["fetch_x_items", "fetch_x_items_batch", "last_fetch_report", "mark_x_items_seen"]
@@ -9,10 +9,18 @@ import requests
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from utils import load_env_file
+from utils import DaemonThreadPool, http_client, load_env_file
+from x.timeline import TimelineState, get_timeline_state, last_fetch_report, record_report
+from x.user_cache import DEFAULT_MISSING_TTL_SECONDS, DEFAULT_TTL_SECONDS, get_user_cache
 
+USER_LOOKUP_BATCH = 100
+DEFAULT_MAX_WORKERS = 4
 
-def fetch_x_items(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+def fetch_x_items(
+    config: Dict[str, Any],
+    report: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
     load_env_file(Path(__file__).resolve().parents[1] / "env.secret")
     token = os.getenv("X_BEARER_TOKEN")
     if not token:
@@ -21,13 +29,105 @@ def fetch_x_items(config: Dict[str, Any]) -> List[Dict[str, Any]]:
     if not accounts:
         return []
     headers = {"Authorization": f"Bearer {token}"}
-    items: List[Dict[str, Any]] = []
+    timelines = _fetch_timelines(_resolve_targets(accounts, headers, config), headers, config, report)
+    return [item for account in accounts for item in timelines.get(account, [])]
+
+
+def fetch_x_items_batch(
+    configs: List[Dict[str, Any]],
+    config: Dict[str, Any],
+) -> List[List[Dict[str, Any]]]:
+    load_env_file(Path(__file__).resolve().parents[1] / "env.secret")
+    token = os.getenv("X_BEARER_TOKEN")
+    accounts: List[str] = []
+    for user_config in configs:
+        for account in user_config.get("x_priority_accounts", []) or []:
+            if account not in accounts:
+                accounts.append(account)
+    if not token or not accounts:
+        return [[] for _ in configs]
+    headers = {"Authorization": f"Bearer {token}"}
+    timelines = _fetch_timelines(_resolve_targets(accounts, headers, config), headers, config)
+    return [
+        [
+            dict(item)
+            for account in user_config.get("x_priority_accounts", []) or []
+            for item in timelines.get(account, [])
+        ]
+        for user_config in configs
+    ]
+
+
+def _resolve_targets(
+    accounts: List[str],
+    headers: Dict[str, str],
+    config: Dict[str, Any],
+) -> List[tuple[str, str, str]]:
+    resolved = _resolve_user_ids(accounts, headers, config)
+    targets = []
     for account in accounts:
-        user_id, author = _resolve_user_id(account, headers)
-        if not user_id:
-            continue
-        items.extend(_fetch_user_tweets(user_id, headers, author))
-    return items
+        user_id, author = resolved.get(account, (None, account))
+        if user_id:
+            targets.append((account, user_id, author))
+    return targets
+
+
+def _fetch_timelines(
+    targets: List[tuple[str, str, str]],
+    headers: Dict[str, str],
+    config: Dict[str, Any],
+    report: Optional[Dict[str, Any]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    state = get_timeline_state(config)
+    incremental = bool(config.get("x_incremental", False))
+    used_before = state.budget.snapshot()["used"]
+
+    def run(user_id: str, author: str) -> Optional[List[Dict[str, Any]]]:
+        if not state.budget.acquire():
+            return None
+        return _fetch_user_tweets(user_id, headers, author, state, incremental)
+
+    timelines: Dict[str, List[Dict[str, Any]]] = {}
+    deferred: List[str] = []
+    if targets:
+        max_workers = int(config.get("x_max_workers", DEFAULT_MAX_WORKERS) or 1)
+        with DaemonThreadPool(
+            max_workers=min(max_workers, len(targets)),
+            thread_name_prefix="x-fetch",
+        ) as executor:
+            futures = [executor.submit(run, user_id, author) for _, user_id, author in targets]
+            for (account, _, _), future in zip(targets, futures):
+                result = future.result()
+                if result is None:
+                    deferred.append(account)
+                    continue
+                timelines[account] = result
+    state.save()
+    budget = state.budget.snapshot()
+    summary = {
+        "accounts": len(targets),
+        "requests": budget["used"] - used_before,
+        "deferred": deferred,
+        "rate_limit_remaining": budget["remaining"],
+        "rate_limit_reset_at": budget["reset_at"],
+    }
+    record_report(summary)
+    if report is not None:
+        report.update(summary)
+    return timelines
+
+
+def mark_x_items_seen(items: List[Dict[str, Any]], config: Dict[str, Any]) -> None:
+    if not config.get("x_incremental", False):
+        return
+    state = get_timeline_state(config)
+    by_user: Dict[str, List[str]] = {}
+    for item in items:
+        if item.get("author_id"):
+            by_user.setdefault(item["author_id"], []).append(str(item.get("id", "")))
+    for user_id, tweet_ids in by_user.items():
+        state.advance(user_id, tweet_ids)
+    state.save()
 
 
 def _load_config(path: str) -> Dict[str, Any]:
@@ -47,45 +147,97 @@ def _cli() -> None:
     config = _load_config(args.config)
     items = fetch_x_items(config)
     print(json.dumps(items, ensure_ascii=False, indent=2))
+    mark_x_items_seen(items, config)
+    print(json.dumps({"x_fetch": last_fetch_report()}), file=sys.stderr)
+
+
+def _resolve_user_ids(
+    accounts: List[str],
+    headers: Dict[str, str],
+    config: Dict[str, Any],
+) -> Dict[str, tuple[Optional[str], str]]:
+    cache = get_user_cache(config)
+    ttl = float(config.get("x_user_cache_ttl_seconds", DEFAULT_TTL_SECONDS))
+    missing_ttl = float(config.get("x_user_missing_ttl_seconds", DEFAULT_MISSING_TTL_SECONDS))
+    resolved: Dict[str, tuple[Optional[str], str]] = {}
+    missing: List[str] = []
+    for account in accounts:
+        if account.isdigit():
+            resolved[account] = (account, account)
+            continue
+        cached = cache.get(account, ttl)
+        if cached:
+            resolved[account] = cached
+        elif cache.is_missing(account, missing_ttl):
+            continue
+        elif account not in missing:
+            missing.append(account)
+    for start in range(0, len(missing), USER_LOOKUP_BATCH):
+        batch = missing[start : start + USER_LOOKUP_BATCH]
+        found = _lookup_usernames(batch, headers)
+        if found is None:
+            continue
+        for account in batch:
+            if account in found:
+                cache.set(account, *found[account])
+                resolved[account] = found[account]
+            else:
+                cache.set_missing(account)
+    if missing:
+        cache.save()
+    return resolved
 
 
-def _resolve_user_id(account: str, headers: Dict[str, str]) -> tuple[Optional[str], str]:
-    if account.isdigit():
-        return account, account
+def _lookup_usernames(accounts: List[str], headers: Dict[str, str]) -> Optional[Dict[str, tuple[str, str]]]:
     try:
-        response = requests.get(
-            f"https://api.x.com/2/users/by/username/{account}",
+        response = http_client.get(
+            "https://api.x.com/2/users/by",
             headers=headers,
+            params={"usernames": ",".join(accounts)},
             timeout=10,
         )
-        if response.status_code == 404:
-            return None, account
         response.raise_for_status()
         data = response.json()
     except requests.RequestException:
-        return None, account
-    user = data.get("data")
-    if isinstance(user, list):
-        user = user[0] if user else {}
-    if not isinstance(user, dict):
-        return None, account
-    user_id = user.get("id")
-    if not user_id or not str(user_id).isdigit():
-        return None, account
-    return str(user_id), user.get("username", account)
-
-
-def _fetch_user_tweets(user_id: str, headers: Dict[str, str], author: str) -> List[Dict[str, Any]]:
+        return None
+    users = data.get("data") or []
+    if isinstance(users, dict):
+        users = [users]
+    by_name = {account.lower(): account for account in accounts}
+    found: Dict[str, tuple[str, str]] = {}
+    for user in users:
+        if not isinstance(user, dict):
+            continue
+        user_id = str(user.get("id", ""))
+        username = user.get("username", "")
+        account = by_name.get(username.lower())
+        if account and user_id.isdigit():
+            found[account] = (user_id, username)
+    return found
+
+
+def _fetch_user_tweets(
+    user_id: str,
+    headers: Dict[str, str],
+    author: str,
+    state: TimelineState,
+    incremental: bool = False,
+) -> List[Dict[str, Any]]:
+    params = {
+        "max_results": 5,
+        "tweet.fields": "created_at,public_metrics",
+    }
+    since_id = state.since_id(user_id) if incremental else None
+    if since_id:
+        params["since_id"] = since_id
     try:
-        response = requests.get(
+        response = http_client.get(
             f"https://api.x.com/2/users/{user_id}/tweets",
             headers=headers,
-            params={
-                "max_results": 5,
-                "tweet.fields": "created_at,public_metrics",
-            },
+            params=params,
             timeout=10,
         )
+        state.budget.update(response.headers, response.status_code)
         response.raise_for_status()
         data = response.json()
     except requests.RequestException:
@@ -96,7 +248,9 @@ def _fetch_user_tweets(user_id: str, headers: Dict[str, str], author: str) -> Li
         metrics = tweet.get("public_metrics", {})
         items.append(
             {
+                "id": tweet.get("id"),
                 "author": author,
+                "author_id": user_id,
                 "text": tweet.get("text", ""),
                 "engagement": {
                     "likes": metrics.get("like_count", 0),
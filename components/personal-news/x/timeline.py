@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils import read_json, resolve_cache_dir, write_json
+
+DEFAULT_RESERVE = 0
+
+_STATES: Dict[Optional[Path], "TimelineState"] = {}
+_STATES_LOCK = threading.Lock()
+_LAST_REPORT: Dict[str, Any] = {}
+
+
+class RateLimitBudget:
+    def __init__(
+        self,
+        remaining: Optional[int] = None,
+        reset_at: Optional[float] = None,
+        reserve: int = DEFAULT_RESERVE,
+    ) -> None:
+        self.remaining = remaining
+        self.reset_at = reset_at
+        self.reserve = reserve
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.reset_at is not None and now >= self.reset_at:
+                self.remaining = None
+                self.reset_at = None
+            if self.remaining is not None:
+                if self.remaining <= self.reserve:
+                    return False
+                self.remaining -= 1
+            self.used += 1
+            return True
+
+    def update(self, headers: Any, status_code: Optional[int] = None) -> None:
+        remaining = _int_header(headers, "x-rate-limit-remaining")
+        reset_at = _int_header(headers, "x-rate-limit-reset")
+        with self._lock:
+            if status_code == 429:
+                remaining = 0
+            if remaining is None:
+                return
+            if reset_at is not None and reset_at != self.reset_at:
+                self.remaining = remaining
+                self.reset_at = float(reset_at)
+            elif self.remaining is None:
+                self.remaining = remaining
+            else:
+                self.remaining = min(self.remaining, remaining)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "used": self.used,
+            }
+
+
+class TimelineState:
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        data = read_json(path) if path is not None else None
+        data = data if isinstance(data, dict) else {}
+        self._since_ids: Dict[str, str] = dict(data.get("since_ids", {}))
+        rate_limit = data.get("rate_limit", {})
+        self.budget = RateLimitBudget(rate_limit.get("remaining"), rate_limit.get("reset_at"))
+
+    def since_id(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            return self._since_ids.get(user_id)
+
+    def advance(self, user_id: str, tweet_ids: List[str]) -> None:
+        numeric = [int(tweet_id) for tweet_id in tweet_ids if str(tweet_id).isdigit()]
+        if not numeric:
+            return
+        with self._lock:
+            current = int(self._since_ids.get(user_id, 0))
+            self._since_ids[user_id] = str(max(current, *numeric))
+
+    def save(self) -> None:
+        if self._path is None:
+            return
+        snapshot = self.budget.snapshot()
+        with self._lock:
+            data = {
+                "since_ids": dict(self._since_ids),
+                "rate_limit": {
+                    "remaining": snapshot["remaining"],
+                    "reset_at": snapshot["reset_at"],
+                },
+            }
+        write_json(self._path, data)
+
+
+def get_timeline_state(config: Dict[str, Any]) -> TimelineState:
+    directory = resolve_cache_dir(config, "x")
+    path = directory / "timeline.json" if directory is not None else None
+    with _STATES_LOCK:
+        state = _STATES.get(path)
+        if state is None:
+            state = TimelineState(path)
+            _STATES[path] = state
+        return state
+
+
+def record_report(report: Dict[str, Any]) -> None:
+    with _STATES_LOCK:
+        _LAST_REPORT.clear()
+        _LAST_REPORT.update(report)
+
+
+def last_fetch_report() -> Dict[str, Any]:
+    with _STATES_LOCK:
+        return dict(_LAST_REPORT)
+
+
+def reset_timeline_state() -> None:
+    with _STATES_LOCK:
+        _STATES.clear()
+        _LAST_REPORT.clear()
+
+
+def _int_header(headers: Any, name: str) -> Optional[int]:
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from utils import read_json, resolve_cache_dir, write_json
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MISSING_TTL_SECONDS = 3600
+
+_CACHES: Dict[Optional[Path], "UserIdCache"] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+class UserIdCache:
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        data = read_json(path) if path is not None else None
+        self._entries: Dict[str, Dict[str, Any]] = data if isinstance(data, dict) else {}
+
+    def get(self, account: str, ttl: float, now: Optional[float] = None) -> Optional[Tuple[str, str]]:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(account.lower())
+        if not entry or not entry.get("id") or now - entry.get("resolved_at", 0) > ttl:
+            return None
+        return entry["id"], entry.get("username", account)
+
+    def is_missing(self, account: str, ttl: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(account.lower())
+        return bool(entry) and not entry.get("id") and now - entry.get("resolved_at", 0) <= ttl
+
+    def set(self, account: str, user_id: str, username: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[account.lower()] = {
+                "id": user_id,
+                "username": username,
+                "resolved_at": now,
+            }
+
+    def set_missing(self, account: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[account.lower()] = {"id": None, "resolved_at": now}
+
+    def save(self) -> None:
+        if self._path is None:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+        write_json(self._path, snapshot)
+
+
+def get_user_cache(config: Dict[str, Any]) -> UserIdCache:
+    directory = resolve_cache_dir(config, "x")
+    path = directory / "users.json" if directory is not None else None
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = UserIdCache(path)
+            _CACHES[path] = cache
+        return cache
+
+
+def reset_user_cache() -> None:
+    with _CACHES_LOCK:
+        _CACHES.clear()
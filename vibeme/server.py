@@ -1,13 +1,216 @@
 #!/usr/bin/env python3
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
+import errno
 import os
+import re
+import select
+import threading
+
+FD_CACHE_SIZE = 64
+READ_CHUNK = 256 * 1024
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+SENDFILE_UNSUPPORTED = {errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSOCK}
+
+
+class OpenFile:
+  def __init__(self, path, fd, stat):
+    self.path = path
+    self.fd = fd
+    self.size = stat.st_size
+    self.mtime_ns = stat.st_mtime_ns
+    self.inode = stat.st_ino
+    self.etag = f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+    self.refs = 0
+    self.evicted = False
+
+  def matches(self, stat) -> bool:
+    return (
+      self.inode == stat.st_ino
+      and self.mtime_ns == stat.st_mtime_ns
+      and self.size == stat.st_size
+    )
+
+
+class FdCache:
+  def __init__(self, maxsize: int = FD_CACHE_SIZE) -> None:
+    self.maxsize = maxsize
+    self._files = OrderedDict()
+    self._lock = threading.Lock()
+
+  def acquire(self, path: str):
+    stat = os.stat(path)
+    with self._lock:
+      entry = self._files.get(path)
+      if entry is not None and entry.matches(stat):
+        self._files.move_to_end(path)
+        entry.refs += 1
+        return entry
+    fd = os.open(path, os.O_RDONLY)
+    entry = OpenFile(path, fd, os.fstat(fd))
+    entry.refs = 1
+    with self._lock:
+      stale = self._files.pop(path, None)
+      if stale is not None:
+        self._retire(stale)
+      self._files[path] = entry
+      while len(self._files) > self.maxsize:
+        _, oldest = self._files.popitem(last=False)
+        self._retire(oldest)
+    return entry
+
+  def release(self, entry: OpenFile) -> None:
+    with self._lock:
+      entry.refs -= 1
+      if entry.evicted and entry.refs == 0:
+        os.close(entry.fd)
+
+  def _retire(self, entry: OpenFile) -> None:
+    entry.evicted = True
+    if entry.refs == 0:
+      os.close(entry.fd)
+
+
+FD_CACHE = FdCache()
+
 
 class VibeMeHandler(SimpleHTTPRequestHandler):
   def do_GET(self) -> None:
     if self.path in {"/", ""}:
       self.path = "/mofalaya/vibeme/index.html"
-    super().do_GET()
+    if not self.serve_file(head=False):
+      super().do_GET()
+
+  def do_HEAD(self) -> None:
+    if self.path in {"/", ""}:
+      self.path = "/mofalaya/vibeme/index.html"
+    if not self.serve_file(head=True):
+      super().do_HEAD()
+
+  def serve_file(self, head: bool) -> bool:
+    path = self.translate_path(self.path)
+    if not os.path.isfile(path):
+      return False
+    try:
+      entry = FD_CACHE.acquire(path)
+    except OSError:
+      self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+      return True
+    try:
+      self.send_entry(entry, head)
+    finally:
+      FD_CACHE.release(entry)
+    return True
+
+  def send_entry(self, entry: OpenFile, head: bool) -> None:
+    if self.not_modified(entry):
+      self.send_response(HTTPStatus.NOT_MODIFIED)
+      self.send_validators(entry)
+      self.end_headers()
+      return
+    byte_range = self.requested_range(entry)
+    if byte_range == "unsatisfiable":
+      self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+      self.send_header("Content-Range", f"bytes */{entry.size}")
+      self.send_header("Content-Length", "0")
+      self.end_headers()
+      return
+    start, end = byte_range or (0, entry.size - 1)
+    length = max(end - start + 1, 0)
+    if byte_range:
+      self.send_response(HTTPStatus.PARTIAL_CONTENT)
+      self.send_header("Content-Range", f"bytes {start}-{end}/{entry.size}")
+    else:
+      self.send_response(HTTPStatus.OK)
+    self.send_header("Content-Type", self.guess_type(entry.path))
+    self.send_header("Content-Length", str(length))
+    self.send_header("Accept-Ranges", "bytes")
+    self.send_validators(entry)
+    self.end_headers()
+    if not head and length:
+      self.wfile.flush()
+      self.send_bytes(entry.fd, start, length)
+
+  def send_validators(self, entry: OpenFile) -> None:
+    self.send_header("ETag", entry.etag)
+    self.send_header("Last-Modified", entry.last_modified)
+    self.send_header("Cache-Control", "no-cache")
+
+  def not_modified(self, entry: OpenFile) -> bool:
+    if_none_match = self.headers.get("If-None-Match")
+    if if_none_match:
+      tags = [tag.strip() for tag in if_none_match.split(",")]
+      return "*" in tags or entry.etag in tags or f"W/{entry.etag}" in tags
+    since = parse_http_date(self.headers.get("If-Modified-Since"))
+    return since is not None and int(entry.mtime_ns // 1_000_000_000) <= since
+
+  def requested_range(self, entry: OpenFile):
+    header = self.headers.get("Range")
+    if not header:
+      return None
+    if_range = self.headers.get("If-Range")
+    if if_range and if_range != entry.etag:
+      since = parse_http_date(if_range)
+      if since is None or int(entry.mtime_ns // 1_000_000_000) > since:
+        return None
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+      return None
+    first, last = match.groups()
+    if first == "":
+      suffix = int(last)
+      if suffix == 0 or entry.size == 0:
+        return "unsatisfiable"
+      return max(entry.size - suffix, 0), entry.size - 1
+    start = int(first)
+    end = int(last) if last else entry.size - 1
+    if start >= entry.size or end < start:
+      return "unsatisfiable"
+    return start, min(end, entry.size - 1)
+
+  def send_bytes(self, fd: int, offset: int, count: int) -> None:
+    if hasattr(os, "sendfile"):
+      offset, count = self.sendfile(fd, offset, count)
+    while count > 0:
+      chunk = os.pread(fd, min(READ_CHUNK, count), offset)
+      if not chunk:
+        break
+      self.wfile.write(chunk)
+      offset += len(chunk)
+      count -= len(chunk)
+
+  def sendfile(self, fd: int, offset: int, count: int):
+    sock = self.connection
+    while count > 0:
+      try:
+        sent = os.sendfile(sock.fileno(), fd, offset, count)
+      except BlockingIOError:
+        select.select([], [sock], [], sock.gettimeout())
+        continue
+      except OSError as exc:
+        if exc.errno in SENDFILE_UNSUPPORTED:
+          break
+        self.close_connection = True
+        raise
+      if sent == 0:
+        self.close_connection = True
+        return offset, 0
+      offset += sent
+      count -= sent
+    return offset, count
+
+
+def parse_http_date(value):
+  if not value:
+    return None
+  try:
+    return parsedate_to_datetime(value).timestamp()
+  except (TypeError, ValueError, IndexError):
+    return None
 
 
 def main() -> None:
@@ -0,0 +1,108 @@
+import http.client
+import os
+import socket
+import sys
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import server  # noqa: E402
+
+BODY = b"0123456789abcdef"
+
+
+class KeepAliveHandler(server.VibeMeHandler):
+  protocol_version = "HTTP/1.1"
+
+  def log_message(self, *args) -> None:
+    pass
+
+
+@pytest.fixture
+def served(tmp_path):
+  (tmp_path / "data.bin").write_bytes(BODY)
+  httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(KeepAliveHandler, directory=str(tmp_path)))
+  thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+  thread.start()
+  yield httpd.server_address
+  httpd.shutdown()
+  httpd.server_close()
+
+
+def _get(address, headers=None):
+  connection = http.client.HTTPConnection(*address, timeout=5)
+  connection.request("GET", "/data.bin", headers=headers or {})
+  response = connection.getresponse()
+  body = response.read()
+  connection.close()
+  return response, body
+
+
+def test_serves_single_byte_ranges(served):
+  response, body = _get(served, {"Range": "bytes=2-5"})
+  assert response.status == 206
+  assert body == BODY[2:6]
+  assert response.getheader("Content-Range") == f"bytes 2-5/{len(BODY)}"
+  assert _get(served, {"Range": "bytes=-3"})[1] == BODY[-3:]
+  assert _get(served, {"Range": "bytes=10-"})[1] == BODY[10:]
+  response, body = _get(served, {"Range": "bytes=100-"})
+  assert response.status == 416
+  assert response.getheader("Content-Range") == f"bytes */{len(BODY)}"
+  assert body == b""
+
+
+def test_if_range_falls_back_to_full_body_when_stale(served):
+  full, _ = _get(served)
+  etag = full.getheader("ETag")
+  response, body = _get(served, {"Range": "bytes=0-3", "If-Range": etag})
+  assert (response.status, body) == (206, BODY[:4])
+  response, body = _get(served, {"Range": "bytes=0-3", "If-Range": '"stale"'})
+  assert (response.status, body) == (200, BODY)
+  response, body = _get(served, {"Range": "bytes=0-3", "If-Range": "Mon, 01 Jan 1990 00:00:00 GMT"})
+  assert (response.status, body) == (200, BODY)
+  assert _get(served, {"If-None-Match": etag})[0].status == 304
+
+
+def test_fd_cache_reuses_and_retires_descriptors(tmp_path):
+  path = tmp_path / "data.bin"
+  path.write_bytes(BODY)
+  cache = server.FdCache(maxsize=1)
+  first = cache.acquire(str(path))
+  assert cache.acquire(str(path)) is first
+  cache.release(first)
+  path.write_bytes(BODY * 2)
+  os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+  second = cache.acquire(str(path))
+  assert second is not first and second.size == len(BODY) * 2
+  os.fstat(first.fd)
+  cache.release(first)
+  with pytest.raises(OSError):
+    os.fstat(first.fd)
+  other = tmp_path / "other.bin"
+  other.write_bytes(BODY)
+  cache.release(cache.acquire(str(other)))
+  os.fstat(second.fd)
+  cache.release(second)
+  with pytest.raises(OSError):
+    os.fstat(second.fd)
+
+
+@pytest.mark.skipif(not hasattr(os, "sendfile"), reason="os.sendfile unavailable")
+def test_short_sendfile_closes_keep_alive_connection(served, monkeypatch):
+  monkeypatch.setattr(server.os, "sendfile", lambda *args: 0)
+  with socket.create_connection(served, timeout=5) as sock:
+    sock.sendall(b"GET /data.bin HTTP/1.1\r\nHost: test\r\n\r\n")
+    received = b""
+    while True:
+      chunk = sock.recv(4096)
+      if not chunk:
+        break
+      received += chunk
+  assert received.startswith(b"HTTP/1.1 200")
+  assert f"Content-Length: {len(BODY)}".encode() in received
+  assert not received.endswith(BODY)